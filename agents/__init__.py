@@ -1,8 +1,11 @@
 # agents package
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, aclose_loop_client, bypass_caches
 from .t_agent import TAgent
 from .n_agent import NAgent
 from .m_agent import MAgent
 from .staging_compiler import StagingCompiler
+from .combined_agent import CombinedAgent
+from .batch_runner import BatchRunner
+from .pool import AsyncAgentPool
 
-__all__ = ['BaseAgent', 'TAgent', 'NAgent', 'MAgent', 'StagingCompiler']
+__all__ = ['BaseAgent', 'aclose_loop_client', 'bypass_caches', 'TAgent', 'NAgent', 'MAgent', 'StagingCompiler', 'CombinedAgent', 'BatchRunner', 'AsyncAgentPool']
@@ -1,22 +1,221 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+from pathlib import Path
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hashlib
 import logging
+import orjson
+import os
+import random
+import threading
+import time
+import weakref
+import httpx
 from mistralai import Mistral
+from mistralai.models import HTTPValidationError, SDKError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from config import get_settings
+from utils import normalize_agent_response
+from .semantic_cache import get_semantic_cache
 
 logger = logging.getLogger(__name__)
 
+# Mistral clients shared by all agents. httpx async connection pools are
+# bound to the event loop that opened them, so async callers get one
+# client per running loop while sync callers share a single client.
+_SYNC_CLIENT: Optional[Mistral] = None
+_LOOP_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Mistral]" = weakref.WeakKeyDictionary()
+_CLIENT_LOCK = threading.Lock()
+
+# Per-loop cap on in-flight async LLM requests (settings.max_concurrent_llm)
+_LOOP_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+# Shared JSON-mode response format; treat as read-only (a plain dict so it
+# stays serializable for the SDK and the LLM cache key)
+JSON_OBJECT_FORMAT: Dict[str, str] = {"type": "json_object"}
+
+# Set by bypass_caches(); skips cache reads (results are still written) for
+# the current context, including tasks and threads spawned from it
+_BYPASS_CACHES: contextvars.ContextVar[bool] = contextvars.ContextVar("bypass_caches", default=False)
+
+# HTTP status codes worth retrying; other 4xx (auth, bad request) fail fast
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+@functools.lru_cache(maxsize=32)
+def _read_prompt_template(filename: str) -> str:
+    """Read a prompt template once per process; prompt files are static."""
+    prompt_path = Path(__file__).parent.parent / "prompts" / filename
+    with open(prompt_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _retry_after_seconds(error: Optional[BaseException]) -> Optional[float]:
+    """Extract a numeric Retry-After header from a Mistral SDK error, if any."""
+    response = getattr(error, "raw_response", None)
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def aclose_loop_client() -> None:
+    """Close the Mistral client bound to the running event loop, if any.
+    
+    Call before a short-lived loop (e.g. one started by asyncio.run) shuts
+    down; the client's pooled connections cannot be reused by another loop.
+    """
+    client = _LOOP_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is None:
+        return
+    config = client.sdk_configuration
+    if config.async_client is not None:
+        await config.async_client.aclose()
+    if config.client is not None:
+        config.client.close()
+
+
+@contextlib.contextmanager
+def bypass_caches():
+    """Skip LLM response and semantic cache hits within the block, refreshing both."""
+    token = _BYPASS_CACHES.set(True)
+    try:
+        yield
+    finally:
+        _BYPASS_CACHES.reset(token)
+
+
+class _JSONObjectTracker:
+    """Track streamed JSON text until the top-level object is complete.
+    
+    Scans chunks as they arrive, following string literals and escapes, so
+    a streamed response can be parsed as soon as its closing brace lands.
+    """
+    
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+        self.complete = False
+    
+    def feed(self, text: str) -> int:
+        """Consume a chunk and return how many characters belong to the object."""
+        for i, char in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+                self.started = True
+            elif char in "}]":
+                self.depth -= 1
+                if self.started and self.depth == 0:
+                    self.complete = True
+                    return i + 1
+        return len(text)
+
 
 class BaseAgent(ABC):
     """Abstract base class for all specialized TNM staging agents."""
     
+    # Pydantic model for a single result; required for analyze_batch
+    result_model: Optional[Type[BaseModel]] = None
+    
+    # Pre-built validator for result_model, shared by all instances
+    _validator: Optional[TypeAdapter] = None
+    
+    # Name used in log and error messages (e.g., "T-Agent")
+    agent_label: str = "Agent"
+    
+    # Task description used when several reports share one batched prompt
+    batch_task: str = ""
+    
+    # Model/max_tokens settings group: "extract" (T/N/M), "compile", or None for the defaults
+    model_tier: Optional[str] = None
+    
     def __init__(self):
         """Initialize the base agent with Mistral client."""
         self.settings = get_settings()
-        self.client = Mistral(api_key=self.settings.mistral_api_key)
-        self.model = self.settings.mistral_model
         self.temperature = self.settings.temperature
-        self.max_tokens = self.settings.max_tokens
+        if self.model_tier == "extract":
+            self.model = self.settings.model_extract
+            self.max_tokens = self.settings.max_tokens_extract
+        elif self.model_tier == "compile":
+            self.model = self.settings.model_compile
+            self.max_tokens = self.settings.max_tokens_compile
+        else:
+            self.model = self.settings.mistral_model
+            self.max_tokens = self.settings.max_tokens
+        self._cache_dir = Path(self.settings.llm_cache_dir).expanduser() if self.settings.enable_llm_cache else None
+    
+    @staticmethod
+    def _get_client(settings) -> Mistral:
+        """Get the Mistral client shared by all agents for the current context.
+        
+        Args:
+            settings: Application settings with API key and timeout
+            
+        Returns:
+            Mistral: Shared client bound to the running event loop, if any
+        """
+        global _SYNC_CLIENT
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if loop is None and _SYNC_CLIENT is not None:
+            return _SYNC_CLIENT
+        if loop is not None and loop in _LOOP_CLIENTS:
+            return _LOOP_CLIENTS[loop]
+        
+        # Sync callers may be worker threads racing to create the shared client
+        with _CLIENT_LOCK:
+            if loop is None and _SYNC_CLIENT is not None:
+                return _SYNC_CLIENT
+            limits = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            client = Mistral(
+                api_key=settings.mistral_api_key,
+                client=httpx.Client(limits=limits, timeout=settings.api_timeout),
+                async_client=httpx.AsyncClient(limits=limits, timeout=settings.api_timeout)
+            )
+            if loop is None:
+                _SYNC_CLIENT = client
+            else:
+                _LOOP_CLIENTS[loop] = client
+            return client
+    
+    @property
+    def client(self) -> Mistral:
+        """Mistral client shared across agents (see _get_client)."""
+        return BaseAgent._get_client(self.settings)
+    
+    def _llm_semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore bounding concurrent LLM requests on the running loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = _LOOP_SEMAPHORES.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, self.settings.max_concurrent_llm))
+            _LOOP_SEMAPHORES[loop] = semaphore
+        return semaphore
+    
+    @functools.cached_property
+    def system_prompt(self) -> str:
+        """System prompt resolved once per agent instance (see get_system_prompt)."""
+        return self.get_system_prompt()
     
     @abstractmethod
     def get_system_prompt(self) -> str:
@@ -40,11 +239,219 @@ class BaseAgent(ABC):
         """
         pass
     
+    def is_retryable_error(self, error: BaseException) -> bool:
+        """Check whether an error is transient and worth retrying.
+        
+        Args:
+            error: Exception raised by an LLM call or response handling
+            
+        Returns:
+            bool: False for non-transient HTTP errors (auth, bad request), True otherwise
+        """
+        # 422 request validation errors are raised as their own type, not as SDKError
+        if isinstance(error, HTTPValidationError):
+            return False
+        if isinstance(error, SDKError):
+            return error.status_code in RETRYABLE_STATUS_CODES
+        return True
+    
+    def backoff_delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Compute the delay before the next retry attempt.
+        
+        Uses the server's Retry-After header when present, otherwise capped
+        exponential backoff with jitter so concurrent workers do not retry
+        in lockstep.
+        
+        Args:
+            attempt: Zero-based index of the attempt that just failed
+            error: Optional exception from the failed attempt
+            
+        Returns:
+            float: Seconds to wait
+        """
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.settings.retry_max_delay)
+        delay = min(self.settings.retry_max_delay, self.settings.retry_delay * (2 ** attempt))
+        return delay + random.uniform(0, delay * 0.25)
+    
+    def _cache_path(
+        self,
+        prompt: str,
+        response_format: Optional[Dict[str, Any]],
+        max_tokens: Optional[int] = None
+    ) -> Optional[Path]:
+        """Get the response cache path for a prompt, or None if caching is disabled."""
+        if self._cache_dir is None:
+            return None
+        key_data = orjson.dumps(
+            [self.model, self.temperature, max_tokens or self.max_tokens, response_format, prompt],
+            option=orjson.OPT_SORT_KEYS
+        )
+        key = hashlib.sha256(key_data).hexdigest()
+        return self._cache_dir / key[:2] / key
+    
+    def _load_cached_response(self, cache_path: Optional[Path]) -> Optional[str]:
+        """Load a cached LLM response if present and not expired."""
+        if cache_path is None or _BYPASS_CACHES.get() or not cache_path.exists():
+            return None
+        ttl = self.settings.llm_cache_ttl
+        if ttl is not None and time.time() - cache_path.stat().st_mtime > ttl:
+            return None
+        try:
+            content = cache_path.read_text(encoding='utf-8')
+            logger.debug("LLM cache hit for %s: %s...", self.__class__.__name__, cache_path.name[:8])
+            return content
+        except OSError as e:
+            logger.warning(f"Failed to load LLM cache: {e}")
+            return None
+    
+    def _save_cached_response(self, cache_path: Optional[Path], content: str) -> None:
+        """Atomically write an LLM response to the cache."""
+        if cache_path is None:
+            return
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(content, encoding='utf-8')
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to save LLM cache: {e}")
+    
+    def _discard_cached_response(self, cache_path: Optional[Path]) -> None:
+        """Remove a cached LLM response, e.g. one that failed validation."""
+        if cache_path is None:
+            return
+        try:
+            cache_path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Failed to remove LLM cache entry: {e}")
+    
+    def semantic_cache_namespace(self, context: Optional[Dict[str, Any]] = None) -> str:
+        """Get the semantic cache partition for a report's context.
+        
+        Args:
+            context: Optional context from other agents
+            
+        Returns:
+            str: Namespace; results are only reused within the same namespace
+        """
+        return self.__class__.__name__
+    
+    def _semantic_cache_match(
+        self,
+        embedding: List[float],
+        context: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Find a cached result for a report embedding, honouring bypass_caches."""
+        cache = get_semantic_cache(
+            self.settings.semantic_cache_dir,
+            self.semantic_cache_namespace(context),
+            self.settings.semantic_cache_threshold
+        )
+        if _BYPASS_CACHES.get():
+            return None
+        return cache.lookup(embedding)
+    
+    def semantic_cache_lookup(
+        self,
+        report_text: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """Look up a result for a near-duplicate report.
+        
+        Embedding failures are logged and treated as a cache miss.
+        
+        Args:
+            report_text: Markdown text of the radiology report
+            context: Optional context from other agents
+            
+        Returns:
+            Tuple of (cached result or None, report embedding or None)
+        """
+        if not self.settings.semantic_cache_enabled:
+            return None, None
+        try:
+            response = self.client.embeddings.create(
+                model=self.settings.semantic_cache_model,
+                inputs=[report_text]
+            )
+            embedding = response.data[0].embedding
+            return self._semantic_cache_match(embedding, context), embedding
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed for {self.__class__.__name__}: {e}")
+            return None, None
+    
+    async def semantic_cache_lookup_async(
+        self,
+        report_text: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """Async variant of semantic_cache_lookup.
+        
+        Args:
+            report_text: Markdown text of the radiology report
+            context: Optional context from other agents
+            
+        Returns:
+            Tuple of (cached result or None, report embedding or None)
+        """
+        if not self.settings.semantic_cache_enabled:
+            return None, None
+        try:
+            response = await self.client.embeddings.create_async(
+                model=self.settings.semantic_cache_model,
+                inputs=[report_text]
+            )
+            embedding = response.data[0].embedding
+            # Loading and searching the cache is blocking work, kept off the event loop
+            return await asyncio.to_thread(self._semantic_cache_match, embedding, context), embedding
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed for {self.__class__.__name__}: {e}")
+            return None, None
+    
+    def semantic_cache_store(
+        self,
+        embedding: Optional[List[float]],
+        context: Optional[Dict[str, Any]],
+        result: Dict[str, Any]
+    ) -> None:
+        """Store a validated result in the semantic cache.
+        
+        Args:
+            embedding: Report embedding from semantic_cache_lookup_async
+            context: Optional context from other agents
+            result: Validated result dict
+        """
+        if embedding is None:
+            return
+        try:
+            get_semantic_cache(
+                self.settings.semantic_cache_dir,
+                self.semantic_cache_namespace(context),
+                self.settings.semantic_cache_threshold
+            ).add(embedding, result)
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed for {self.__class__.__name__}: {e}")
+    
+    async def semantic_cache_store_async(
+        self,
+        embedding: Optional[List[float]],
+        context: Optional[Dict[str, Any]],
+        result: Dict[str, Any]
+    ) -> None:
+        """Async variant of semantic_cache_store; the locked file rewrite runs in a worker thread."""
+        if embedding is None:
+            return
+        await asyncio.to_thread(self.semantic_cache_store, embedding, context, result)
+    
     def call_llm(
         self, 
         system_prompt: str, 
         user_message: str,
-        response_format: Optional[Dict[str, Any]] = None
+        response_format: Optional[Dict[str, Any]] = None,
+        max_tokens: Optional[int] = None,
+        save_to_cache: bool = True
     ) -> str:
         """Call Mistral LLM with retry logic.
         
@@ -52,6 +459,9 @@ class BaseAgent(ABC):
             system_prompt: System prompt for the agent
             user_message: User message containing report text and instructions
             response_format: Optional JSON schema for structured output
+            max_tokens: Optional generation cap overriding the agent's max_tokens
+            save_to_cache: Write the response to the LLM cache; validated callers
+                pass False and cache it themselves once it validates
             
         Returns:
             str: LLM response text
@@ -60,6 +470,11 @@ class BaseAgent(ABC):
         # This matches the working pattern from md_to_json.py
         combined_prompt = f"{system_prompt}\n\n{user_message}"
         
+        cache_path = self._cache_path(combined_prompt, response_format, max_tokens)
+        cached = self._load_cached_response(cache_path)
+        if cached is not None:
+            return cached
+        
         messages = [
             {"role": "user", "content": combined_prompt}
         ]
@@ -71,22 +486,376 @@ class BaseAgent(ABC):
                     messages=messages,  # type: ignore
                     response_format=response_format if response_format else None,
                     temperature=self.temperature,
-                    max_tokens=self.max_tokens
+                    max_tokens=max_tokens or self.max_tokens
                 )
                 
                 response_content = response.choices[0].message.content  # type: ignore
                 if response_content:
+                    if save_to_cache:
+                        self._save_cached_response(cache_path, response_content)  # type: ignore
                     return response_content  # type: ignore
                 else:
                     raise ValueError("Empty response from Mistral API")
                 
             except Exception as e:
                 logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+                if not self.is_retryable_error(e):
+                    logger.error(f"Non-retryable error for {self.__class__.__name__}")
+                    raise
                 if attempt == self.settings.max_retries - 1:
                     logger.error(f"All retry attempts failed for {self.__class__.__name__}")
                     raise
-                import time
-                time.sleep(self.settings.retry_delay * (attempt + 1))
+                time.sleep(self.backoff_delay(attempt, e))
+    
+    async def call_llm_async(
+        self, 
+        system_prompt: str, 
+        user_message: str,
+        response_format: Optional[Dict[str, Any]] = None,
+        max_tokens: Optional[int] = None,
+        save_to_cache: bool = True
+    ) -> str:
+        """Async variant of call_llm using the Mistral async chat endpoint.
+        
+        Args:
+            system_prompt: System prompt for the agent
+            user_message: User message containing report text and instructions
+            response_format: Optional JSON schema for structured output
+            max_tokens: Optional generation cap overriding the agent's max_tokens
+            save_to_cache: Write the response to the LLM cache (see call_llm)
+            
+        Returns:
+            str: LLM response text
+        """
+        combined_prompt = f"{system_prompt}\n\n{user_message}"
+        
+        cache_path = self._cache_path(combined_prompt, response_format, max_tokens)
+        cached = self._load_cached_response(cache_path)
+        if cached is not None:
+            return cached
+        
+        messages = [
+            {"role": "user", "content": combined_prompt}
+        ]
+        
+        for attempt in range(self.settings.max_retries):
+            try:
+                async with self._llm_semaphore():
+                    response = await self.client.chat.complete_async(
+                        model=self.model,
+                        messages=messages,  # type: ignore
+                        response_format=response_format if response_format else None,
+                        temperature=self.temperature,
+                        max_tokens=max_tokens or self.max_tokens
+                    )
+                
+                response_content = response.choices[0].message.content  # type: ignore
+                if response_content:
+                    if save_to_cache:
+                        self._save_cached_response(cache_path, response_content)  # type: ignore
+                    return response_content  # type: ignore
+                else:
+                    raise ValueError("Empty response from Mistral API")
+                
+            except Exception as e:
+                logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+                if not self.is_retryable_error(e):
+                    logger.error(f"Non-retryable error for {self.__class__.__name__}")
+                    raise
+                if attempt == self.settings.max_retries - 1:
+                    logger.error(f"All retry attempts failed for {self.__class__.__name__}")
+                    raise
+                await asyncio.sleep(self.backoff_delay(attempt, e))
+    
+    async def call_llm_stream_json_async(
+        self,
+        system_prompt: str,
+        user_message: str,
+        max_tokens: Optional[int] = None,
+        save_to_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Stream a JSON-mode response and parse it once the object is complete.
+        
+        Chunks are scanned as they arrive, so the response is parsed as soon
+        as the top-level JSON object closes rather than after the stream ends.
+        
+        Args:
+            system_prompt: System prompt for the agent
+            user_message: User message containing report text and instructions
+            max_tokens: Optional generation cap overriding the agent's max_tokens
+            save_to_cache: Write the response to the LLM cache (see call_llm)
+            
+        Returns:
+            Dict parsed from the LLM's JSON response
+        """
+        response_format = JSON_OBJECT_FORMAT
+        combined_prompt = f"{system_prompt}\n\n{user_message}"
+        
+        cache_path = self._cache_path(combined_prompt, response_format, max_tokens)
+        cached = self._load_cached_response(cache_path)
+        if cached is not None:
+            return orjson.loads(cached)
+        
+        messages = [
+            {"role": "user", "content": combined_prompt}
+        ]
+        
+        for attempt in range(self.settings.max_retries):
+            try:
+                tracker = _JSONObjectTracker()
+                parts: List[str] = []
+                async with self._llm_semaphore():
+                    response = await self.client.chat.stream_async(
+                        model=self.model,
+                        messages=messages,  # type: ignore
+                        response_format=response_format,  # type: ignore
+                        temperature=self.temperature,
+                        max_tokens=max_tokens or self.max_tokens
+                    )
+                    async with response as event_stream:
+                        async for event in event_stream:
+                            delta = event.data.choices[0].delta.content if event.data.choices else None
+                            if not isinstance(delta, str) or not delta:
+                                continue
+                            parts.append(delta[:tracker.feed(delta)])
+                            if tracker.complete:
+                                break
+                
+                response_content = "".join(parts)
+                if not response_content.strip():
+                    raise ValueError("Empty response from Mistral API")
+                result = orjson.loads(response_content)
+                if save_to_cache:
+                    self._save_cached_response(cache_path, response_content)
+                return result
+                
+            except Exception as e:
+                logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+                if not self.is_retryable_error(e):
+                    logger.error(f"Non-retryable error for {self.__class__.__name__}")
+                    raise
+                if attempt == self.settings.max_retries - 1:
+                    logger.error(f"All retry attempts failed for {self.__class__.__name__}")
+                    raise
+                await asyncio.sleep(self.backoff_delay(attempt, e))
+    
+    def parse_and_validate(self, response: Union[str, Dict[str, Any]]) -> BaseModel:
+        """Parse an LLM JSON response, normalize it and validate against result_model.
+        
+        Args:
+            response: Raw JSON text, or an already-parsed dict
+            
+        Returns:
+            BaseModel: Validated result model instance
+        """
+        result_dict = orjson.loads(response) if isinstance(response, (str, bytes)) else response
+        return self._validator.validate_python(normalize_agent_response(result_dict))
+    
+    def _handle_validated_attempt_failure(
+        self,
+        attempt: int,
+        error: Exception,
+        response: Optional[Union[str, Dict[str, Any]]]
+    ) -> None:
+        """Log a failed validated-call attempt, raising if it should not be retried."""
+        label = self.agent_label
+        max_retries = self.settings.max_retries
+        final = attempt >= max_retries - 1
+        
+        if isinstance(error, orjson.JSONDecodeError):
+            if final:
+                logger.error(f"{label}: Failed to parse JSON response after {max_retries} attempts: {error}")
+                logger.error(f"{label}: Raw response was: {response}")
+                raise ValueError(f"Invalid JSON response from {label}: {error}") from error
+            logger.warning(f"{label}: JSON parse failed (attempt {attempt + 1}/{max_retries}), retrying...")
+        elif isinstance(error, ValidationError):
+            if final:
+                logger.error(f"{label}: Validation failed after {max_retries} attempts: {error}")
+                logger.error(f"{label}: Response was: {response}")
+                raise ValueError(f"{label} validation error: {error}") from error
+            logger.warning(f"{label}: Validation failed (attempt {attempt + 1}/{max_retries}), retrying LLM call...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Validation error: %s", str(error)[:200])
+        else:
+            if final or not self.is_retryable_error(error):
+                logger.error(f"{label}: Analysis failed after {attempt + 1} attempts: {error}")
+                raise error
+            logger.warning(f"{label}: Error (attempt {attempt + 1}/{max_retries}), retrying...")
+    
+    def call_llm_validated(self, system_prompt: str, user_message: str) -> BaseModel:
+        """Request a JSON response and validate it, retrying parse and validation failures.
+        
+        Args:
+            system_prompt: System prompt for the agent
+            user_message: User message containing report text and instructions
+            
+        Returns:
+            BaseModel: Validated result model instance
+        """
+        # Only responses that validate are cached, so a retry never re-reads a bad one
+        cache_path = self._cache_path(f"{system_prompt}\n\n{user_message}", JSON_OBJECT_FORMAT)
+        for attempt in range(self.settings.max_retries):
+            response = None
+            try:
+                response = self.call_llm(
+                    system_prompt=system_prompt,
+                    user_message=user_message,
+                    response_format=JSON_OBJECT_FORMAT,
+                    save_to_cache=False
+                )
+                logger.debug("%s raw response (attempt %d): %.500s", self.agent_label, attempt + 1, response)
+                result = self.parse_and_validate(response)
+                self._save_cached_response(cache_path, response)
+                return result
+            except Exception as e:
+                # Drops a stale entry that no longer validates (e.g. after a schema change)
+                self._discard_cached_response(cache_path)
+                self._handle_validated_attempt_failure(attempt, e, response)
+                time.sleep(self.backoff_delay(attempt))
+    
+    async def call_llm_validated_async(
+        self,
+        system_prompt: str,
+        user_message: str,
+        stream: bool = False
+    ) -> BaseModel:
+        """Async variant of call_llm_validated.
+        
+        Args:
+            system_prompt: System prompt for the agent
+            user_message: User message containing report text and instructions
+            stream: Stream the response and parse it as soon as the JSON object completes
+            
+        Returns:
+            BaseModel: Validated result model instance
+        """
+        # Only responses that validate are cached (see call_llm_validated)
+        cache_path = self._cache_path(f"{system_prompt}\n\n{user_message}", JSON_OBJECT_FORMAT)
+        for attempt in range(self.settings.max_retries):
+            response = None
+            try:
+                if stream:
+                    response = await self.call_llm_stream_json_async(system_prompt, user_message, save_to_cache=False)
+                else:
+                    response = await self.call_llm_async(
+                        system_prompt=system_prompt,
+                        user_message=user_message,
+                        response_format=JSON_OBJECT_FORMAT,
+                        save_to_cache=False
+                    )
+                    logger.debug("%s raw response (attempt %d): %.500s", self.agent_label, attempt + 1, response)
+                result = self.parse_and_validate(response)
+                self._save_cached_response(cache_path, response if isinstance(response, str) else orjson.dumps(response).decode())
+                return result
+            except Exception as e:
+                self._discard_cached_response(cache_path)
+                self._handle_validated_attempt_failure(attempt, e, response)
+                await asyncio.sleep(self.backoff_delay(attempt))
+    
+    def format_batch_report(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Format a single report for inclusion in a batched prompt.
+        
+        Args:
+            report_text: Markdown text of the radiology report
+            context: Optional per-report context from other agents
+            
+        Returns:
+            str: Report section to embed in the batched user message
+        """
+        return report_text
+    
+    def analyze_batch(
+        self,
+        reports: List[str],
+        contexts: Optional[List[Optional[Dict[str, Any]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Analyze several reports, packing up to batch_size reports per LLM call.
+        
+        Rows that are missing from the batched response or fail validation
+        are retried individually through analyze().
+        
+        Args:
+            reports: Markdown texts of the radiology reports
+            contexts: Optional per-report contexts, aligned with reports
+            
+        Returns:
+            List of result dicts in the same order as reports
+        """
+        if self.result_model is None:
+            raise NotImplementedError(f"{self.__class__.__name__} does not support batch analysis")
+        if contexts is None:
+            contexts = [None] * len(reports)
+        if len(contexts) != len(reports):
+            raise ValueError("contexts must have the same length as reports")
+        
+        batch_size = max(1, self.settings.batch_size)
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(reports), batch_size):
+            results.extend(self._analyze_chunk(
+                reports[start:start + batch_size],
+                contexts[start:start + batch_size]
+            ))
+        return results
+    
+    def _analyze_chunk(
+        self,
+        reports: List[str],
+        contexts: List[Optional[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Analyze one chunk of reports with a single LLM call."""
+        name = self.__class__.__name__
+        if len(reports) == 1:
+            return [self.analyze(reports[0], contexts[0])]
+        
+        sections = [
+            f"REPORT {i}:\n{self.format_batch_report(report, context)}"
+            for i, (report, context) in enumerate(zip(reports, contexts), 1)
+        ]
+        user_message = f"""Analyze each of the following {len(reports)} PET-CT radiology reports independently and {self.batch_task}.
+
+Return a JSON object of the form {{"results": [...]}} containing exactly {len(reports)} entries in report order, each entry in the JSON format specified in the system prompt.
+
+""" + "\n\n".join(sections)
+        
+        # The batched response is cached only if every row validates (see call_llm_validated)
+        max_tokens = self.max_tokens * len(reports)
+        cache_path = self._cache_path(f"{self.system_prompt}\n\n{user_message}", JSON_OBJECT_FORMAT, max_tokens)
+        response_text = None
+        rows: List[Any] = []
+        try:
+            response_text = self.call_llm(
+                system_prompt=self.system_prompt,
+                user_message=user_message,
+                response_format=JSON_OBJECT_FORMAT,
+                max_tokens=max_tokens,
+                save_to_cache=False
+            )
+            rows = orjson.loads(response_text).get("results", [])
+            if not isinstance(rows, list):
+                rows = []
+            if len(rows) != len(reports):
+                logger.warning(f"{name}: Batch returned {len(rows)} results for {len(reports)} reports")
+        except Exception as e:
+            logger.warning(f"{name}: Batch call failed, falling back to per-report analysis: {e}")
+        
+        results = []
+        all_valid = len(rows) == len(reports)
+        for i, (report, context) in enumerate(zip(reports, contexts)):
+            try:
+                if i >= len(rows) or not isinstance(rows[i], dict):
+                    raise ValueError("missing batch row")
+                result = self.parse_and_validate(rows[i])
+                results.append(result.model_dump())
+            except Exception as e:
+                all_valid = False
+                logger.warning(f"{name}: Batch row {i + 1} invalid, retrying alone: {str(e)[:200]}")
+                results.append(self.analyze(report, context))
+        
+        if all_valid and response_text is not None:
+            self._save_cached_response(cache_path, response_text)
+        else:
+            self._discard_cached_response(cache_path)
+        return results
     
     def load_prompt_template(self, filename: str) -> str:
         """Load a prompt template from the prompts directory.
@@ -97,7 +866,9 @@ class BaseAgent(ABC):
         Returns:
             str: Prompt template content
         """
-        from pathlib import Path
-        prompt_path = Path(__file__).parent.parent / "prompts" / filename
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return _read_prompt_template(filename)
+    
+    @classmethod
+    def reload_prompts(cls) -> None:
+        """Drop cached prompt templates so agents created afterwards re-read edited prompt files (for development)."""
+        _read_prompt_template.cache_clear()
@@ -0,0 +1,256 @@
+from typing import Any, Callable, Dict, List, Optional
+import logging
+import orjson
+import time
+from mistralai import Mistral
+from config import get_settings
+from .base_agent import BaseAgent, JSON_OBJECT_FORMAT
+from .t_agent import TAgent
+from .n_agent import NAgent
+from .m_agent import MAgent
+from .staging_compiler import StagingCompiler
+from .stage_table import compile_from_table
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRunner:
+    """Offline TNM staging of a report corpus through the Mistral Batch API.
+
+    Batch jobs are billed at a discount and are not subject to the synchronous
+    rate limits, at the cost of latency. Staging runs in three rounds because
+    N-Agent needs the tumor laterality found by T-Agent, and the compiler needs
+    all three components:
+
+    1. T-Agent and M-Agent requests (custom_id prefixes ``t-`` and ``m-``)
+    2. N-Agent requests with laterality context (``n-``)
+    3. Staging Compiler requests (``c-``) for rows the stage table cannot map
+
+    Rows that fail or do not validate are re-run through the synchronous agent.
+    """
+
+    TERMINAL_STATUSES = {"SUCCESS", "FAILED", "TIMEOUT_EXCEEDED", "CANCELLED"}
+
+    def __init__(self, poll_interval: float = 10.0, timeout: Optional[float] = None):
+        """Initialize the runner and agents.
+
+        Args:
+            poll_interval: Seconds between batch job status checks
+            timeout: Seconds to wait for each batch job (default: settings.batch_timeout)
+        """
+        self.settings = get_settings()
+        self.model = self.settings.mistral_model
+        self.poll_interval = poll_interval
+        self.timeout = timeout if timeout is not None else self.settings.batch_timeout
+        self.t_agent = TAgent()
+        self.n_agent = NAgent()
+        self.m_agent = MAgent()
+        self.compiler = StagingCompiler()
+
+    @property
+    def client(self) -> Mistral:
+        """Mistral client shared with the agents (see BaseAgent._get_client)."""
+        return BaseAgent._get_client(self.settings)
+
+    def build_request(self, custom_id: str, agent: BaseAgent, user_message: str) -> Dict[str, Any]:
+        """Build one batch JSONL entry matching BaseAgent.call_llm.
+
+        Args:
+            custom_id: Identifier used to route the result back
+            agent: Agent whose system prompt and sampling settings are used
+            user_message: User message for the request
+
+        Returns:
+            Dict for a single line of the batch input file
+        """
+        return {
+            "custom_id": custom_id,
+            "body": {
+                "messages": [
+                    {"role": "user", "content": f"{agent.system_prompt}\n\n{user_message}"}
+                ],
+                "response_format": JSON_OBJECT_FORMAT,
+                "temperature": agent.temperature,
+                "max_tokens": agent.max_tokens
+            }
+        }
+
+    def submit(self, requests: List[Dict[str, Any]], model: Optional[str] = None) -> str:
+        """Upload batch requests as JSONL and create a batch job.
+
+        Args:
+            requests: Entries built with build_request
+            model: Model for the job (default: settings.mistral_model)
+
+        Returns:
+            str: Batch job ID
+        """
+        payload = b"\n".join(orjson.dumps(request) for request in requests)
+        batch_file = self.client.files.upload(
+            file={"file_name": "tnm_batch.jsonl", "content": payload},
+            purpose="batch"
+        )
+        job = self.client.batch.jobs.create(
+            input_files=[batch_file.id],
+            model=model or self.model,
+            endpoint="/v1/chat/completions"
+        )
+        logger.info(f"Batch Runner: Submitted job {job.id} with {len(requests)} requests")
+        return job.id
+
+    def wait(self, job_id: str) -> Any:
+        """Poll a batch job until it reaches a terminal status.
+
+        Args:
+            job_id: Batch job ID
+
+        Returns:
+            The completed batch job
+
+        Raises:
+            TimeoutError: If the job is still running after self.timeout seconds;
+                the job is cancelled first
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            job = self.client.batch.jobs.get(job_id=job_id)
+            if job.status in self.TERMINAL_STATUSES:
+                break
+            if time.monotonic() >= deadline:
+                logger.warning(f"Batch Runner: Job {job_id} still {job.status} after {self.timeout}s, cancelling")
+                self.client.batch.jobs.cancel(job_id=job_id)
+                raise TimeoutError(f"Batch job {job_id} did not finish within {self.timeout}s")
+            logger.debug(f"Batch Runner: Job {job_id} status {job.status}")
+            time.sleep(self.poll_interval)
+
+        if job.status != "SUCCESS":
+            logger.warning(f"Batch Runner: Job {job_id} finished with status {job.status}")
+        return job
+
+    def fetch_results(self, job: Any) -> Dict[str, str]:
+        """Download a finished job's output and extract message contents.
+
+        Args:
+            job: Completed batch job
+
+        Returns:
+            Dict mapping custom_id to the LLM response text
+        """
+        if not job.output_file:
+            return {}
+
+        output = self.client.files.download(file_id=job.output_file)
+        contents = {}
+        for line in output.read().splitlines():
+            if not line.strip():
+                continue
+            row = orjson.loads(line)
+            try:
+                contents[row["custom_id"]] = row["response"]["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                logger.warning(f"Batch Runner: No response content for {row.get('custom_id')}")
+        return contents
+
+    def run(self, requests: List[Dict[str, Any]], model: Optional[str] = None) -> Dict[str, str]:
+        """Submit requests, wait for completion and return response texts.
+
+        Args:
+            requests: Entries built with build_request
+            model: Model for the job (default: settings.mistral_model)
+
+        Returns:
+            Dict mapping custom_id to the LLM response text
+        """
+        if not requests:
+            return {}
+        return self.fetch_results(self.wait(self.submit(requests, model)))
+
+    def _validate(
+        self,
+        agent: BaseAgent,
+        content: Optional[str],
+        fallback: Callable[[], Dict[str, Any]],
+        custom_id: str
+    ) -> Dict[str, Any]:
+        """Validate a batch response, re-running the request synchronously on failure."""
+        try:
+            if content is None:
+                raise ValueError("missing batch result")
+            return agent.parse_and_validate(content).model_dump()
+        except Exception as e:
+            logger.warning(f"Batch Runner: {custom_id} invalid, retrying synchronously: {str(e)[:200]}")
+            return fallback()
+
+    def stage_reports(self, reports: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Stage a corpus of reports end to end through the Batch API.
+
+        Args:
+            reports: Dict mapping report ID to markdown report text
+
+        Returns:
+            Dict mapping report ID to a dict with t_result, n_result, m_result,
+            final_staging and error keys
+        """
+        results: Dict[str, Dict[str, Any]] = {
+            report_id: {"t_result": None, "n_result": None, "m_result": None, "final_staging": None, "error": None}
+            for report_id in reports
+        }
+
+        def guarded(report_id: str, key: str, fn: Callable[[], Dict[str, Any]]) -> None:
+            try:
+                results[report_id][key] = fn()
+            except Exception as e:
+                logger.error(f"Batch Runner: {key} failed for {report_id}: {e}")
+                results[report_id]["error"] = f"{key} error: {str(e)}"
+
+        # Round 1: T-Agent and M-Agent
+        requests = []
+        for report_id, text in reports.items():
+            requests.append(self.build_request(f"t-{report_id}", self.t_agent, self.t_agent.build_user_message(text)))
+            requests.append(self.build_request(f"m-{report_id}", self.m_agent, self.m_agent.build_user_message(text)))
+        contents = self.run(requests, self.t_agent.model)
+        for report_id, text in reports.items():
+            guarded(report_id, "t_result", lambda: self._validate(
+                self.t_agent, contents.get(f"t-{report_id}"), lambda: self.t_agent.analyze(text), f"t-{report_id}"))
+            guarded(report_id, "m_result", lambda: self._validate(
+                self.m_agent, contents.get(f"m-{report_id}"), lambda: self.m_agent.analyze(text), f"m-{report_id}"))
+
+        # Round 2: N-Agent with laterality from T-Agent
+        contexts = {}
+        requests = []
+        for report_id, text in reports.items():
+            t_result = results[report_id]["t_result"] or {}
+            contexts[report_id] = {"tumor_laterality": t_result["laterality"]} if t_result.get("laterality") else {}
+            requests.append(self.build_request(
+                f"n-{report_id}", self.n_agent, self.n_agent.build_user_message(text, contexts[report_id])))
+        contents = self.run(requests, self.n_agent.model)
+        for report_id, text in reports.items():
+            guarded(report_id, "n_result", lambda: self._validate(
+                self.n_agent, contents.get(f"n-{report_id}"),
+                lambda: self.n_agent.analyze(text, contexts[report_id]), f"n-{report_id}"))
+
+        # Round 3: Staging Compiler for reports with all components not resolved by the stage table
+        complete = []
+        for report_id, result in results.items():
+            if not (result["t_result"] and result["n_result"] and result["m_result"]):
+                continue
+            table_result = compile_from_table(result["t_result"], result["n_result"], result["m_result"])
+            if table_result is not None:
+                guarded(report_id, "final_staging", lambda: self.compiler.parse_and_validate(table_result).model_dump())
+            else:
+                complete.append(report_id)
+        requests = [
+            self.build_request(f"c-{report_id}", self.compiler, self.compiler.build_user_message(
+                results[report_id]["t_result"], results[report_id]["n_result"], results[report_id]["m_result"]))
+            for report_id in complete
+        ]
+        contents = self.run(requests, self.compiler.model)
+        for report_id in complete:
+            result = results[report_id]
+            guarded(report_id, "final_staging", lambda: self._validate(
+                self.compiler, contents.get(f"c-{report_id}"),
+                lambda: self.compiler.compile_staging(result["t_result"], result["n_result"], result["m_result"]),
+                f"c-{report_id}"))
+
+        logger.info(f"Batch Runner: Staged {sum(1 for r in results.values() if r['final_staging'])}/{len(reports)} reports")
+        return results
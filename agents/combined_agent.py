@@ -0,0 +1,170 @@
+from typing import Dict, Any, Optional
+from pathlib import Path
+import logging
+import orjson
+from .base_agent import BaseAgent, JSON_OBJECT_FORMAT
+from .t_agent import TAgent
+from .n_agent import NAgent
+from .m_agent import MAgent
+
+logger = logging.getLogger(__name__)
+
+_SYSTEM_HEADER = """You are performing three independent TNM staging analyses of the same PET-CT report.
+Follow each section's instructions, and return a single JSON object of the form
+{"t": <T-stage JSON>, "n": <N-stage JSON>, "m": <M-stage JSON>}, where each value
+uses the JSON format specified in its section.
+
+For the N-stage, use the tumor laterality you determine in the T-stage analysis
+to classify ipsilateral vs contralateral lymph nodes."""
+
+_USER_HEADER = """Analyze the following PET-CT radiology report and determine the T-stage, N-stage and M-stage.
+
+REPORT TEXT:
+"""
+_USER_FOOTER = """
+
+Provide your analysis as a single JSON object with "t", "n" and "m" keys as specified in the system prompt."""
+
+
+class CombinedAgent(BaseAgent):
+    """T/N/M staging in one LLM call, re-running only sections that fail validation."""
+
+    agent_label = "Combined-Agent"
+    model_tier = "extract"
+
+    def __init__(self):
+        """Initialize the combined agent and the component agents used for validation and fallback."""
+        super().__init__()
+        self.t_agent = TAgent()
+        self.n_agent = NAgent()
+        self.m_agent = MAgent()
+        # Three results share one response
+        self.max_tokens = 3 * self.max_tokens
+
+    def get_system_prompt(self) -> str:
+        """Combine the T, N and M staging prompts under section headers."""
+        return "\n\n".join([
+            _SYSTEM_HEADER,
+            "=== T-STAGE SECTION (key \"t\") ===\n" + self.t_agent.system_prompt,
+            "=== N-STAGE SECTION (key \"n\") ===\n" + self.n_agent.system_prompt,
+            "=== M-STAGE SECTION (key \"m\") ===\n" + self.m_agent.system_prompt
+        ])
+
+    def build_user_message(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Build the combined staging user message for a report."""
+        return _USER_HEADER + report_text + _USER_FOOTER
+
+    def _validate_section(self, sections: Any, key: str, agent: BaseAgent) -> Dict[str, Any]:
+        """Validate one section of the combined response with its component agent."""
+        section = sections.get(key) if isinstance(sections, dict) else None
+        if not isinstance(section, dict):
+            raise ValueError("missing section")
+        return agent.parse_and_validate(section).model_dump()
+    
+    def _fallback_context(self, key: str, results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get the context for re-running one section alone (tumor laterality for N)."""
+        if key != "n":
+            return None
+        laterality = (results.get("t_result") or {}).get("laterality")
+        return {"tumor_laterality": laterality} if laterality else {}
+    
+    def _store_response(self, cache_path: Optional[Path], response_text: Optional[str], all_valid: bool) -> None:
+        """Cache the combined response if every section validated, otherwise drop any stale entry."""
+        if all_valid and response_text is not None:
+            self._save_cached_response(cache_path, response_text)
+        else:
+            self._discard_cached_response(cache_path)
+    
+    def _log_result(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Log the combined TNM string and return the results."""
+        logger.info(
+            "Combined-Agent: Determined %s%s%s",
+            results["t_result"]["stage"], results["n_result"]["stage"], results["m_result"]["stage"]
+        )
+        return results
+    
+    def analyze(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Stage a report with one LLM call.
+        
+        Each section is validated with its component agent; a section that is
+        missing or invalid is re-run with that agent alone, so the other
+        sections are kept. N-Agent reruns get tumor laterality from the T result.
+        
+        Args:
+            report_text: Markdown text of the radiology report
+            context: Optional context (not used)
+            
+        Returns:
+            Dict with t_result, n_result and m_result keys
+        """
+        logger.info("Combined-Agent: Starting combined T/N/M staging analysis")
+        
+        user_message = self.build_user_message(report_text, context)
+        # The response is cached only once every section validates (see call_llm_validated)
+        cache_path = self._cache_path(f"{self.system_prompt}\n\n{user_message}", JSON_OBJECT_FORMAT)
+        response_text = None
+        sections: Dict[str, Any] = {}
+        try:
+            response_text = self.call_llm(
+                system_prompt=self.system_prompt,
+                user_message=user_message,
+                response_format=JSON_OBJECT_FORMAT,
+                save_to_cache=False
+            )
+            sections = orjson.loads(response_text)
+        except Exception as e:
+            logger.warning(f"Combined-Agent: Combined call failed, falling back to per-agent analysis: {e}")
+        
+        results: Dict[str, Any] = {}
+        all_valid = True
+        for key, agent in (("t", self.t_agent), ("m", self.m_agent), ("n", self.n_agent)):
+            try:
+                results[f"{key}_result"] = self._validate_section(sections, key, agent)
+            except Exception as e:
+                all_valid = False
+                logger.warning(f"Combined-Agent: {key.upper()} section invalid, re-running {agent.agent_label}: {str(e)[:200]}")
+                results[f"{key}_result"] = agent.analyze(report_text, self._fallback_context(key, results))
+        
+        self._store_response(cache_path, response_text, all_valid)
+        return self._log_result(results)
+    
+    async def analyze_async(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async variant of analyze.
+        
+        Args:
+            report_text: Markdown text of the radiology report
+            context: Optional context (not used)
+            
+        Returns:
+            Dict with t_result, n_result and m_result keys
+        """
+        logger.info("Combined-Agent: Starting combined T/N/M staging analysis")
+        
+        user_message = self.build_user_message(report_text, context)
+        # The response is cached only once every section validates (see call_llm_validated)
+        cache_path = self._cache_path(f"{self.system_prompt}\n\n{user_message}", JSON_OBJECT_FORMAT)
+        response_text = None
+        sections: Dict[str, Any] = {}
+        try:
+            response_text = await self.call_llm_async(
+                system_prompt=self.system_prompt,
+                user_message=user_message,
+                response_format=JSON_OBJECT_FORMAT,
+                save_to_cache=False
+            )
+            sections = orjson.loads(response_text)
+        except Exception as e:
+            logger.warning(f"Combined-Agent: Combined call failed, falling back to per-agent analysis: {e}")
+        
+        results: Dict[str, Any] = {}
+        all_valid = True
+        for key, agent in (("t", self.t_agent), ("m", self.m_agent), ("n", self.n_agent)):
+            try:
+                results[f"{key}_result"] = self._validate_section(sections, key, agent)
+            except Exception as e:
+                all_valid = False
+                logger.warning(f"Combined-Agent: {key.upper()} section invalid, re-running {agent.agent_label}: {str(e)[:200]}")
+                results[f"{key}_result"] = await agent.analyze_async(report_text, self._fallback_context(key, results))
+        
+        self._store_response(cache_path, response_text, all_valid)
+        return self._log_result(results)
@@ -1,120 +1,131 @@
 from typing import Dict, Any, Optional
-import json
 import logging
 from .base_agent import BaseAgent
 from models import NStageResult
-from utils import validate_with_retry, normalize_agent_response
-from pydantic import ValidationError
+from pydantic import TypeAdapter
 
 logger = logging.getLogger(__name__)
 
+# Static parts of the user message; only laterality and report text vary per call
+_USER_HEADER = """Analyze the following PET-CT radiology report and determine the N-stage for lymph node involvement.
+
+"""
+_LATERALITY_TEMPLATE = """TUMOR LATERALITY: {laterality}
+
+This is CRITICAL for determining ipsilateral vs contralateral lymph nodes."""
+_NO_LATERALITY_BLOCK = "WARNING: Tumor laterality was not provided. Please attempt to determine it from the report and use it for staging."
+_REPORT_HEADER = """
+
+REPORT TEXT:
+"""
+_USER_FOOTER = """
+
+Provide your analysis in JSON format as specified in the system prompt."""
+
 
 class NAgent(BaseAgent):
     """N-Agent for lymph node staging analysis."""
     
+    agent_label = "N-Agent"
+    model_tier = "extract"
+    result_model = NStageResult
+    _validator = TypeAdapter(NStageResult)
+    batch_task = "determine the N-stage for lymph node involvement"
+    
     def get_system_prompt(self) -> str:
         """Load N-staging system prompt."""
         return self.load_prompt_template("n_staging_prompt.txt")
     
-    def analyze(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Analyze report for N-stage determination.
+    def format_batch_report(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Prefix a batched report with its tumor laterality when known."""
+        laterality = context.get('tumor_laterality') if context else None
+        if laterality:
+            return f"TUMOR LATERALITY: {laterality.upper()}\n\n{report_text}"
+        return f"TUMOR LATERALITY: NOT PROVIDED (determine it from the report)\n\n{report_text}"
+    
+    def semantic_cache_namespace(self, context: Optional[Dict[str, Any]] = None) -> str:
+        """Partition cached N-stage results by tumor laterality."""
+        laterality = context.get('tumor_laterality') if context else None
+        return f"{self.__class__.__name__}-{laterality or 'unknown'}"
+    
+    def build_user_message(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Build the N-staging user message, including tumor laterality if available.
         
         Args:
             report_text: Markdown text of the radiology report
             context: Context from T-Agent containing tumor laterality
             
         Returns:
-            Dict containing N-stage result validated against NStageResult schema
+            str: User message for the LLM
         """
-        logger.info("N-Agent: Starting lymph node staging analysis")
-        
         # Extract tumor laterality from context
         laterality = None
         if context and 'tumor_laterality' in context:
             laterality = context['tumor_laterality']
-            logger.info(f"N-Agent: Using tumor laterality: {laterality}")
+            logger.info("N-Agent: Using tumor laterality: %s", laterality)
         else:
             logger.warning("N-Agent: No tumor laterality provided in context, attempting to infer from report")
         
-        system_prompt = self.get_system_prompt()
-        
-        # Build user message with laterality context if available
         if laterality:
-            user_message = f"""Analyze the following PET-CT radiology report and determine the N-stage for lymph node involvement.
-
-TUMOR LATERALITY: {laterality.upper()}
-
-This is CRITICAL for determining ipsilateral vs contralateral lymph nodes.
-
-REPORT TEXT:
-{report_text}
-
-Provide your analysis in JSON format as specified in the system prompt."""
+            laterality_block = _LATERALITY_TEMPLATE.format(laterality=laterality.upper())
         else:
-            user_message = f"""Analyze the following PET-CT radiology report and determine the N-stage for lymph node involvement.
-
-WARNING: Tumor laterality was not provided. Please attempt to determine it from the report and use it for staging.
-
-REPORT TEXT:
-{report_text}
-
-Provide your analysis in JSON format as specified in the system prompt."""
+            laterality_block = _NO_LATERALITY_BLOCK
+        return _USER_HEADER + laterality_block + _REPORT_HEADER + report_text + _USER_FOOTER
+    
+    def _reuse_cached_result(self, cached_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Log and return a result reused from the semantic cache."""
+        logger.info("N-Agent: Reusing result from semantically similar report (stage %s)", cached_result.get('stage'))
+        return cached_result
+    
+    def _finish_result(self, n_stage_result: NStageResult) -> Dict[str, Any]:
+        """Log a validated result and return it as a dict."""
+        logger.info("N-Agent: Determined stage %s", n_stage_result.stage)
+        logger.info("N-Agent: Found %d involved node stations", len(n_stage_result.involved_nodes))
+        result = n_stage_result.model_dump()
+        return result
+    
+    def analyze(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analyze report for N-stage determination.
+        
+        Args:
+            report_text: Markdown text of the radiology report
+            context: Context from T-Agent containing tumor laterality
+            
+        Returns:
+            Dict containing N-stage result validated against NStageResult schema
+        """
+        logger.info("N-Agent: Starting lymph node staging analysis")
+        
+        user_message = self.build_user_message(report_text, context)
+        
+        cached_result, embedding = self.semantic_cache_lookup(report_text, context)
+        if cached_result is not None:
+            return self._reuse_cached_result(cached_result)
+        
+        n_stage_result = self.call_llm_validated(self.system_prompt, user_message)
+        result = self._finish_result(n_stage_result)
+        self.semantic_cache_store(embedding, context, result)
+        return result
+    
+    async def analyze_async(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async variant of analyze.
+        
+        Args:
+            report_text: Markdown text of the radiology report
+            context: Context from T-Agent containing tumor laterality
+            
+        Returns:
+            Dict containing N-stage result validated against NStageResult schema
+        """
+        logger.info("N-Agent: Starting lymph node staging analysis")
         
-        import time
+        user_message = self.build_user_message(report_text, context)
         
-        max_retries = self.settings.max_retries
-        retry_delay = self.settings.retry_delay
+        cached_result, embedding = await self.semantic_cache_lookup_async(report_text, context)
+        if cached_result is not None:
+            return self._reuse_cached_result(cached_result)
         
-        for attempt in range(max_retries):
-            try:
-                # Request JSON response from Mistral
-                response_text = self.call_llm(
-                    system_prompt=system_prompt,
-                    user_message=user_message,
-                    response_format={"type": "json_object"}
-                )
-                
-                # Parse JSON response
-                result_dict = json.loads(response_text)
-                
-                # Normalize response before validation
-                normalized_dict = normalize_agent_response(result_dict.copy())
-                
-                # Validate against Pydantic model
-                n_stage_result = NStageResult(**normalized_dict)
-                
-                logger.info(f"N-Agent: Determined stage {n_stage_result.stage}")
-                logger.info(f"N-Agent: Found {len(n_stage_result.involved_nodes)} involved node stations")
-                return n_stage_result.model_dump()
-                
-            except json.JSONDecodeError as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"N-Agent: JSON parse failed (attempt {attempt + 1}/{max_retries}), retrying...")
-                    time.sleep(retry_delay * (2 ** attempt))
-                    continue
-                else:
-                    logger.error(f"N-Agent: Failed to parse JSON response after {max_retries} attempts: {e}")
-                    raise ValueError(f"Invalid JSON response from N-Agent: {e}")
-            except ValidationError as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"N-Agent: Validation failed (attempt {attempt + 1}/{max_retries}), retrying LLM call...")
-                    logger.debug(f"Validation error: {str(e)[:200]}")
-                    if 'result_dict' in locals():
-                        logger.debug(f"Failed dict: {json.dumps(result_dict, indent=2)}")
-                    time.sleep(retry_delay * (2 ** attempt))
-                    continue
-                else:
-                    logger.error(f"N-Agent: Validation failed after {max_retries} attempts: {e}")
-                    if 'result_dict' in locals():
-                        logger.error(f"N-Agent: Parsed dict was: {json.dumps(result_dict, indent=2)}")
-                    raise ValueError(f"N-Agent validation error: {e}")
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"N-Agent: Error (attempt {attempt + 1}/{max_retries}), retrying...")
-                    time.sleep(retry_delay * (2 ** attempt))
-                    continue
-                else:
-                    logger.error(f"N-Agent: Analysis failed after {max_retries} attempts: {e}")
-                    if 'result_dict' in locals():
-                        logger.error(f"N-Agent: Parsed dict was: {json.dumps(result_dict, indent=2)}")
-                    raise
+        n_stage_result = await self.call_llm_validated_async(self.system_prompt, user_message)
+        result = self._finish_result(n_stage_result)
+        await self.semantic_cache_store_async(embedding, context, result)
+        return result
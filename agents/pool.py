@@ -0,0 +1,130 @@
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import logging
+import weakref
+from config import get_settings
+from .t_agent import TAgent
+from .n_agent import NAgent
+from .m_agent import MAgent
+from .staging_compiler import StagingCompiler
+from .base_agent import aclose_loop_client
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAgentPool:
+    """Stage many reports concurrently with bounded in-flight LLM work.
+
+    A fixed set of workers consumes reports from a bounded queue, so a slow
+    API applies backpressure to the producer instead of buffering the whole
+    corpus. A semaphore shared by every run_many call on the same event loop
+    caps the number of reports being staged at once. Use as an async context
+    manager (or call aclose) to close the loop's Mistral client when done.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, compile_staging: bool = True):
+        """Initialize the pool and its agents.
+
+        Args:
+            max_concurrency: Maximum reports staged at once (default: settings.max_concurrency)
+            compile_staging: Also run the Staging Compiler for each report
+        """
+        self.settings = get_settings()
+        self.max_concurrency = max(1, max_concurrency or self.settings.max_concurrency)
+        self.compile_staging = compile_staging
+        self.t_agent = TAgent()
+        self.n_agent = NAgent()
+        self.m_agent = MAgent()
+        self.compiler = StagingCompiler()
+        # asyncio primitives bind to the loop that first awaits them, so keep one per loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    async def aclose(self) -> None:
+        """Close the running loop's shared Mistral client."""
+        self._semaphores.pop(asyncio.get_running_loop(), None)
+        await aclose_loop_client()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def stage_report(self, report_text: str) -> Dict[str, Any]:
+        """Stage one report: T-Agent then N-Agent, with M-Agent alongside.
+
+        Args:
+            report_text: Markdown text of the radiology report
+
+        Returns:
+            Dict with t_result, n_result, m_result, final_staging and error keys
+        """
+        result: Dict[str, Any] = {
+            "t_result": None, "n_result": None, "m_result": None, "final_staging": None, "error": None
+        }
+
+        async def t_then_n() -> None:
+            result["t_result"] = await self.t_agent.analyze_async(report_text)
+            laterality = result["t_result"].get("laterality")
+            context = {"tumor_laterality": laterality} if laterality else {}
+            result["n_result"] = await self.n_agent.analyze_async(report_text, context=context)
+
+        async def m() -> None:
+            result["m_result"] = await self.m_agent.analyze_async(report_text)
+
+        try:
+            await asyncio.gather(t_then_n(), m())
+            if self.compile_staging:
+                result["final_staging"] = await asyncio.to_thread(
+                    self.compiler.compile_staging,
+                    result["t_result"], result["n_result"], result["m_result"]
+                )
+        except Exception as e:
+            logger.error(f"Agent Pool: Staging failed: {e}")
+            result["error"] = str(e)
+        return result
+
+    async def run_many(self, reports: Iterable[str]) -> List[Dict[str, Any]]:
+        """Stage reports with at most max_concurrency in flight.
+
+        Args:
+            reports: Markdown report texts; may be a lazy iterable
+
+        Returns:
+            List of per-report results in input order (see stage_report)
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2 * self.max_concurrency)
+        results: Dict[int, Dict[str, Any]] = {}
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                try:
+                    if item is None:
+                        return
+                    index, report_text = item
+                    async with semaphore:
+                        results[index] = await self.stage_report(report_text)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.max_concurrency)]
+        try:
+            count = 0
+            for count, report_text in enumerate(reports, 1):
+                await queue.put((count - 1, report_text))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+        logger.info(f"Agent Pool: Staged {count} reports")
+        return [results[i] for i in range(count)]
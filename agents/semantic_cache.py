@@ -0,0 +1,161 @@
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import logging
+import os
+import threading
+import numpy as np
+import orjson
+from filelock import FileLock
+
+try:
+    import faiss
+except ImportError:  # faiss is optional; fall back to a numpy inner-product search
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Embedding-similarity cache of agent results for near-duplicate reports.
+
+    Embeddings are L2-normalized so inner product equals cosine similarity.
+    Uses a faiss IndexFlatIP when faiss is installed, otherwise an exact
+    numpy search. Entries are persisted as ``<namespace>.npy`` (embeddings)
+    and ``<namespace>.json`` (results) in the cache directory; reads and
+    writes hold ``<namespace>.lock`` so worker processes can share them.
+    """
+
+    def __init__(self, cache_dir: str, namespace: str, threshold: float = 0.95):
+        """Load or create the cache for a namespace.
+
+        Args:
+            cache_dir: Directory for persisted embeddings and results
+            namespace: Cache partition (e.g., agent name plus relevant context)
+            threshold: Minimum cosine similarity for a cache hit
+        """
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self._embeddings_path = self.cache_dir / f"{namespace}.npy"
+        self._results_path = self.cache_dir / f"{namespace}.json"
+        self._file_lock = FileLock(str(self.cache_dir / f"{namespace}.lock"), thread_local=False)
+        self._lock = threading.Lock()
+        self._embeddings: Optional[np.ndarray] = None
+        self._results: List[Dict[str, Any]] = []
+        self._index = None
+        with self._file_lock:
+            self._load()
+
+    def _load(self) -> None:
+        """Load persisted entries, starting empty if the files are missing or corrupt.
+
+        Callers hold the file lock so the two files are read as a pair.
+        """
+        if not (self._embeddings_path.exists() and self._results_path.exists()):
+            return
+        try:
+            embeddings = np.load(self._embeddings_path).astype(np.float32)
+            results = orjson.loads(self._results_path.read_bytes())
+            if len(embeddings) != len(results):
+                raise ValueError("embedding/result count mismatch")
+            self._embeddings = embeddings
+            self._results = results
+            self._rebuild_index()
+            logger.info(f"Loaded {len(results)} semantic cache entries from {self._results_path.name}")
+        except Exception as e:
+            logger.warning(f"Failed to load semantic cache: {e}")
+
+    def _rebuild_index(self) -> None:
+        """Rebuild the faiss index from the stored embeddings."""
+        if faiss is None or self._embeddings is None:
+            return
+        self._index = faiss.IndexFlatIP(self._embeddings.shape[1])
+        self._index.add(self._embeddings)
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """Return the result of the most similar cached report above the threshold.
+
+        Args:
+            embedding: Embedding of the report being analyzed
+
+        Returns:
+            Cached result dict, or None on a miss
+        """
+        with self._lock:
+            if self._embeddings is None or not self._results:
+                return None
+            query = self._normalize(embedding)
+            if self._index is not None:
+                scores, indices = self._index.search(query, 1)
+                score, index = float(scores[0][0]), int(indices[0][0])
+            else:
+                similarities = self._embeddings @ query[0]
+                index = int(np.argmax(similarities))
+                score = float(similarities[index])
+            if score < self.threshold:
+                return None
+            logger.debug("Semantic cache hit (similarity %.4f)", score)
+            return dict(self._results[index])
+
+    def add(self, embedding: List[float], result: Dict[str, Any]) -> None:
+        """Insert a result and persist the cache.
+
+        Args:
+            embedding: Embedding of the analyzed report
+            result: Validated agent result dict
+        """
+        with self._lock, self._file_lock:
+            # Pick up entries other worker processes added since this one loaded
+            self._load()
+            vector = self._normalize(embedding)
+            if self._embeddings is None:
+                self._embeddings = vector
+            else:
+                self._embeddings = np.vstack([self._embeddings, vector])
+            self._results.append(result)
+            if self._index is not None:
+                self._index.add(vector)
+            else:
+                self._rebuild_index()
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Failed to save semantic cache: {e}")
+
+    def _save(self) -> None:
+        """Atomically write both files; callers hold the file lock."""
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        embeddings_tmp = self._embeddings_path.with_name(self._embeddings_path.name + suffix)
+        results_tmp = self._results_path.with_name(self._results_path.name + suffix)
+        with open(embeddings_tmp, "wb") as f:
+            np.save(f, self._embeddings)
+        results_tmp.write_bytes(orjson.dumps(self._results))
+        os.replace(embeddings_tmp, self._embeddings_path)
+        os.replace(results_tmp, self._results_path)
+
+
+_caches: Dict[str, SemanticCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_semantic_cache(cache_dir: str, namespace: str, threshold: float) -> SemanticCache:
+    """Get the process-wide SemanticCache for a namespace.
+
+    Args:
+        cache_dir: Directory for persisted embeddings and results
+        namespace: Cache partition
+        threshold: Minimum cosine similarity for a cache hit
+
+    Returns:
+        SemanticCache shared by all agents using the namespace
+    """
+    with _caches_lock:
+        if namespace not in _caches:
+            _caches[namespace] = SemanticCache(cache_dir, namespace, threshold)
+        return _caches[namespace]
@@ -0,0 +1,149 @@
+"""
+Deterministic TNM 9th Edition stage grouping for lung cancer.
+
+Mirrors the prognostic stage group table in prompts/compiler_prompt.txt so
+the Staging Compiler can skip the LLM call when the T/N/M components are
+well-formed and consistent.
+"""
+
+from typing import Any, Dict, Optional
+
+_T1 = ("T1a", "T1b", "T1c")
+_T2 = ("T2a", "T2b")
+
+STAGE_GROUP: Dict[tuple, str] = {
+    ("TX", "N0", "M0"): "Occult carcinoma",
+    ("Tis", "N0", "M0"): "Stage 0",
+    ("T1mi", "N0", "M0"): "Stage IA1",
+    ("T1a", "N0", "M0"): "Stage IA1",
+    ("T1b", "N0", "M0"): "Stage IA2",
+    ("T1c", "N0", "M0"): "Stage IA3",
+    ("T2a", "N0", "M0"): "Stage IB",
+    ("T2b", "N0", "M0"): "Stage IIA",
+    ("T3", "N0", "M0"): "Stage IIB",
+    ("T3", "N1", "M0"): "Stage IIIA",
+    ("T4", "N0", "M0"): "Stage IIIA",
+    ("T4", "N1", "M0"): "Stage IIIA",
+    ("T3", "N2a", "M0"): "Stage IIIB",
+    ("T4", "N2a", "M0"): "Stage IIIB",
+    ("T3", "N2b", "M0"): "Stage IIIC",
+    ("T3", "N3", "M0"): "Stage IIIC",
+    ("T4", "N2b", "M0"): "Stage IIIC",
+    ("T4", "N3", "M0"): "Stage IIIC",
+}
+for _t in _T1 + _T2:
+    STAGE_GROUP[(_t, "N1", "M0")] = "Stage IIB"
+    STAGE_GROUP[(_t, "N2a", "M0")] = "Stage IIIA"
+    STAGE_GROUP[(_t, "N2b", "M0")] = "Stage IIIB"
+    STAGE_GROUP[(_t, "N3", "M0")] = "Stage IIIB"
+
+# Any T, any N
+M1_STAGE_GROUP: Dict[str, str] = {
+    "M1a": "Stage IVA",
+    "M1b": "Stage IVA",
+    "M1c1": "Stage IVB",
+    "M1c2": "Stage IVB",
+}
+
+T_STAGES = {"TX", "Tis", "T1mi"} | set(_T1) | set(_T2) | {"T3", "T4"}
+N_STAGES = {"N0", "N1", "N2a", "N2b", "N3"}
+
+
+def compose_tnm(t_stage: str, n_stage: str, m_stage: str) -> str:
+    """Combine component stages into a TNM string (e.g., T2aN2bM0)."""
+    return f"{t_stage}{n_stage}{m_stage}"
+
+
+def lookup_stage_group(t_stage: str, n_stage: str, m_stage: str) -> Optional[str]:
+    """Map component stages to the prognostic stage group.
+
+    Returns:
+        Stage group (e.g., "Stage IIIB"), or None if the combination is not in the table
+    """
+    if t_stage not in T_STAGES or n_stage not in N_STAGES:
+        return None
+    if m_stage in M1_STAGE_GROUP:
+        return M1_STAGE_GROUP[m_stage]
+    return STAGE_GROUP.get((t_stage, n_stage, m_stage))
+
+
+def _is_consistent(t_result: Dict[str, Any], n_result: Dict[str, Any], m_result: Dict[str, Any]) -> bool:
+    """Check that component details agree with their stages and none are low-confidence."""
+    if any((r.get("confidence") or "").strip().lower() == "low" for r in (t_result, n_result, m_result)):
+        return False
+    if not all((r.get("evidence") or "").strip() for r in (t_result, n_result, m_result)):
+        return False
+    if (n_result["stage"] == "N0") != (not n_result.get("involved_nodes")):
+        return False
+    if (m_result["stage"] == "M0") != (not m_result.get("metastasis_sites")):
+        return False
+    return True
+
+
+def _build_summary(
+    overall_stage: str,
+    tnm_stage: str,
+    t_result: Dict[str, Any],
+    n_result: Dict[str, Any],
+    m_result: Dict[str, Any]
+) -> str:
+    """Build a templated clinical summary from component results."""
+    tumor = t_result["stage"]
+    details = []
+    if t_result.get("tumor_size_mm"):
+        details.append(f"{t_result['tumor_size_mm']:g} mm")
+    if t_result.get("location"):
+        details.append(str(t_result["location"]))
+    if details:
+        tumor += f" ({', '.join(details)})"
+    if t_result.get("invasion"):
+        tumor += f" with invasion of {', '.join(t_result['invasion'])}"
+
+    stations = [node.get("station") for node in n_result.get("involved_nodes") or [] if node.get("station")]
+    nodes = n_result["stage"]
+    nodes += f" (stations {', '.join(stations)})" if stations else " (no pathologic lymph nodes)"
+
+    organs = sorted({site.get("organ_system") for site in m_result.get("metastasis_sites") or [] if site.get("organ_system")})
+    metastasis = m_result["stage"]
+    metastasis += f" ({', '.join(organs)})" if organs else " (no distant metastases)"
+
+    return (
+        f"This is {overall_stage} lung cancer (c{tnm_stage}) based on a primary tumor classified "
+        f"as {tumor}, nodal status {nodes}, and metastatic status {metastasis}. "
+        f"Stage group assigned from the TNM 9th Edition prognostic stage table."
+    )
+
+
+def compile_from_table(
+    t_result: Dict[str, Any],
+    n_result: Dict[str, Any],
+    m_result: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Compile TNM staging deterministically for well-formed, consistent components.
+
+    Args:
+        t_result: T-stage result dictionary
+        n_result: N-stage result dictionary
+        m_result: M-stage result dictionary
+
+    Returns:
+        Dict matching the TNMStaging schema, or None if the LLM compiler is needed
+    """
+    t_stage = (t_result.get("stage") or "").strip()
+    n_stage = (n_result.get("stage") or "").strip()
+    m_stage = (m_result.get("stage") or "").strip()
+
+    overall_stage = lookup_stage_group(t_stage, n_stage, m_stage)
+    if overall_stage is None or not _is_consistent(t_result, n_result, m_result):
+        return None
+
+    tnm_stage = compose_tnm(t_stage, n_stage, m_stage)
+    return {
+        "tnm_stage": tnm_stage,
+        "overall_stage": overall_stage,
+        "tumor": t_result,
+        "nodes": n_result,
+        "metastasis": m_result,
+        "summary": _build_summary(overall_stage, tnm_stage, t_result, n_result, m_result),
+        "clinical_stage_prefix": "c"
+    }
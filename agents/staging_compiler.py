@@ -1,28 +1,43 @@
 from typing import Dict, Any
-import json
 import logging
+import orjson
 from .base_agent import BaseAgent
-from models import TNMStaging, TStageResult, NStageResult, MStageResult
-from utils import validate_with_retry, normalize_agent_response
-from pydantic import ValidationError
+from .stage_table import compile_from_table
+from models import TNMStaging
+from pydantic import TypeAdapter
 
 logger = logging.getLogger(__name__)
 
 
+def _compact_component(result: Dict[str, Any]) -> str:
+    """Serialize a component result compactly for the compiler prompt.
+    
+    Drops null and empty-list fields; the result models restore them from
+    defaults, and every other field is kept because the compiler echoes
+    the components back in its TNMStaging output.
+    """
+    projected = {k: v for k, v in result.items() if v is not None and v != []}
+    return orjson.dumps(projected).decode()
+
+
 class StagingCompiler(BaseAgent):
     """Staging Compiler agent for combining T, N, M results into final staging."""
     
+    agent_label = "Staging Compiler"
+    model_tier = "compile"
+    _validator = TypeAdapter(TNMStaging)
+    
     def get_system_prompt(self) -> str:
         """Load staging compiler system prompt."""
         return self.load_prompt_template("compiler_prompt.txt")
     
-    def compile_staging(
+    def build_user_message(
         self,
         t_result: Dict[str, Any],
         n_result: Dict[str, Any],
         m_result: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Compile final TNM staging from individual component results.
+    ) -> str:
+        """Build the compiler user message from individual component results.
         
         Args:
             t_result: T-stage result dictionary
@@ -30,29 +45,18 @@ class StagingCompiler(BaseAgent):
             m_result: M-stage result dictionary
             
         Returns:
-            Dict containing final TNM staging validated against TNMStaging schema
+            str: User message for the LLM
         """
-        logger.info("Staging Compiler: Compiling final TNM staging")
-        
-        system_prompt = self.get_system_prompt()
-        
-        # Format the input for the compiler
-        input_data = {
-            "t_stage": t_result,
-            "n_stage": n_result,
-            "m_stage": m_result
-        }
-        
-        user_message = f"""Compile the final TNM staging from the following individual component analyses:
+        return f"""Compile the final TNM staging from the following individual component analyses:
 
 T-STAGE ANALYSIS:
-{json.dumps(t_result, indent=2)}
+{_compact_component(t_result)}
 
 N-STAGE ANALYSIS:
-{json.dumps(n_result, indent=2)}
+{_compact_component(n_result)}
 
 M-STAGE ANALYSIS:
-{json.dumps(m_result, indent=2)}
+{_compact_component(m_result)}
 
 Tasks:
 1. Validate the consistency of these staging components
@@ -61,64 +65,41 @@ Tasks:
 4. Generate a comprehensive clinical summary
 
 Provide your complete staging result in JSON format as specified in the system prompt."""
+    
+    def compile_staging(
+        self,
+        t_result: Dict[str, Any],
+        n_result: Dict[str, Any],
+        m_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Compile final TNM staging from individual component results.
+        
+        Well-formed, consistent components are mapped directly through the
+        TNM 9th Edition stage table; the LLM is only called otherwise.
+        
+        Args:
+            t_result: T-stage result dictionary
+            n_result: N-stage result dictionary
+            m_result: M-stage result dictionary
+            
+        Returns:
+            Dict containing final TNM staging validated against TNMStaging schema
+        """
+        logger.info("Staging Compiler: Compiling final TNM staging")
+        
+        table_result = compile_from_table(t_result, n_result, m_result)
+        if table_result is not None:
+            tnm_staging = self._validator.validate_python(table_result)
+            logger.info("Staging Compiler: Final staging from stage table - %s (%s)", tnm_staging.tnm_stage, tnm_staging.overall_stage)
+            return tnm_staging.model_dump()
         
-        import time
+        system_prompt = self.system_prompt
+        user_message = self.build_user_message(t_result, n_result, m_result)
         
-        max_retries = self.settings.max_retries
-        retry_delay = self.settings.retry_delay
+        tnm_staging = self.call_llm_validated(system_prompt, user_message)
         
-        for attempt in range(max_retries):
-            try:
-                # Request JSON response from Mistral
-                response_text = self.call_llm(
-                    system_prompt=system_prompt,
-                    user_message=user_message,
-                    response_format={"type": "json_object"}
-                )
-                
-                # Parse JSON response
-                result_dict = json.loads(response_text)
-                
-                # Normalize response before validation
-                normalized_dict = normalize_agent_response(result_dict.copy())
-                
-                # Validate against Pydantic model
-                tnm_staging = TNMStaging(**normalized_dict)
-                
-                logger.info(f"Staging Compiler: Final staging - {tnm_staging.tnm_stage} ({tnm_staging.overall_stage})")
-                return tnm_staging.model_dump()
-                
-            except json.JSONDecodeError as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"Staging Compiler: JSON parse failed (attempt {attempt + 1}/{max_retries}), retrying...")
-                    time.sleep(retry_delay * (2 ** attempt))
-                    continue
-                else:
-                    logger.error(f"Staging Compiler: Failed to parse JSON response after {max_retries} attempts: {e}")
-                    raise ValueError(f"Invalid JSON response from Staging Compiler: {e}")
-            except ValidationError as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"Staging Compiler: Validation failed (attempt {attempt + 1}/{max_retries}), retrying LLM call...")
-                    logger.debug(f"Validation error: {str(e)[:200]}")
-                    if 'result_dict' in locals():
-                        logger.debug(f"Failed dict: {json.dumps(result_dict, indent=2)}")
-                    time.sleep(retry_delay * (2 ** attempt))
-                    continue
-                else:
-                    logger.error(f"Staging Compiler: Validation failed after {max_retries} attempts: {e}")
-                    if 'result_dict' in locals():
-                        logger.error(f"Staging Compiler: Parsed dict was: {json.dumps(result_dict, indent=2)}")
-                    raise ValueError(f"Staging Compiler validation error: {e}")
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"Staging Compiler: Error (attempt {attempt + 1}/{max_retries}), retrying...")
-                    time.sleep(retry_delay * (2 ** attempt))
-                    continue
-                else:
-                    logger.error(f"Staging Compiler: Compilation failed after {max_retries} attempts: {e}")
-                    if 'result_dict' in locals():
-                        logger.error(f"Staging Compiler: Parsed dict was: {json.dumps(result_dict, indent=2)}")
-                    raise
+        logger.info("Staging Compiler: Final staging - %s (%s)", tnm_staging.tnm_stage, tnm_staging.overall_stage)
+        return tnm_staging.model_dump()
     
     def analyze(self, report_text: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Wrapper method to match BaseAgent interface.
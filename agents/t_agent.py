@@ -1,21 +1,106 @@
-from typing import Dict, Any, Optional
-import json
+from typing import Dict, Any, Optional, Union
 import logging
+import orjson
 from .base_agent import BaseAgent
+from .stage_table import T_STAGES
 from models import TStageResult
-from utils import validate_with_retry, normalize_agent_response
-from pydantic import ValidationError
+from pydantic import TypeAdapter
+from utils import normalize_agent_response
 
 logger = logging.getLogger(__name__)
 
+# Static parts of the user message; only the report text varies per call
+_USER_HEADER = """Analyze the following PET-CT radiology report and determine the T-stage for the primary lung tumor.
+
+REPORT TEXT:
+"""
+_USER_FOOTER = """
+
+Provide your analysis in JSON format as specified in the system prompt."""
+
+_T_STAGE_REQUIRED = {"stage", "evidence"}
+_OPTIONAL_STR_FIELDS = ("location", "confidence")
+_LIST_FIELDS = ("invasion", "separate_nodules")
+
+
+def _is_well_formed(data: Dict[str, Any]) -> bool:
+    """Cheap type check for a normalized T-stage dict that can skip full validation."""
+    if not _T_STAGE_REQUIRED.issubset(data) or data["stage"] not in T_STAGES:
+        return False
+    if not isinstance(data["evidence"], str):
+        return False
+    size = data.get("tumor_size_mm")
+    if size is not None and (isinstance(size, bool) or not isinstance(size, (int, float))):
+        return False
+    if data.get("laterality") not in (None, "left", "right"):
+        return False
+    if any(data.get(field) is not None and not isinstance(data[field], str) for field in _OPTIONAL_STR_FIELDS):
+        return False
+    for field in _LIST_FIELDS:
+        value = data.get(field)
+        if value is not None and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+            return False
+    return True
+
 
 class TAgent(BaseAgent):
     """T-Agent for tumor staging analysis."""
     
+    agent_label = "T-Agent"
+    model_tier = "extract"
+    result_model = TStageResult
+    _validator = TypeAdapter(TStageResult)
+    batch_task = "determine the T-stage for the primary lung tumor"
+    
     def get_system_prompt(self) -> str:
         """Load T-staging system prompt."""
         return self.load_prompt_template("t_staging_prompt.txt")
     
+    def parse_and_validate(self, response: Union[str, Dict[str, Any]]) -> TStageResult:
+        """Parse a T-stage response, constructing the model directly when well-formed.
+        
+        TStageResult is flat, so a dict that passes the cheap type check is
+        built with model_construct; anything else goes through full validation,
+        whose ValidationError triggers the usual retry.
+        
+        Args:
+            response: Raw JSON text, or an already-parsed dict
+            
+        Returns:
+            TStageResult: Result model instance
+        """
+        result_dict = orjson.loads(response) if isinstance(response, (str, bytes)) else response
+        data = normalize_agent_response(result_dict)
+        if isinstance(data, dict) and _is_well_formed(data):
+            if data.get("tumor_size_mm") is not None:
+                data["tumor_size_mm"] = float(data["tumor_size_mm"])
+            return TStageResult.model_construct(**{k: data[k] for k in TStageResult.model_fields if k in data})
+        return self._validator.validate_python(data)
+    
+    def build_user_message(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Build the T-staging user message for a report.
+        
+        Args:
+            report_text: Markdown text of the radiology report
+            context: Optional context (not used for T-Agent)
+            
+        Returns:
+            str: User message for the LLM
+        """
+        return _USER_HEADER + report_text + _USER_FOOTER
+    
+    def _reuse_cached_result(self, cached_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Log and return a result reused from the semantic cache."""
+        logger.info("T-Agent: Reusing result from semantically similar report (stage %s)", cached_result.get('stage'))
+        return cached_result
+    
+    def _finish_result(self, t_stage_result: TStageResult) -> Dict[str, Any]:
+        """Log a validated result and return it as a dict."""
+        logger.info("T-Agent: Determined stage %s", t_stage_result.stage)
+        # Flat model of plain values, so its field dict is already the dumped form
+        result = dict(t_stage_result.__dict__)
+        return result
+    
     def analyze(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Analyze report for T-stage determination.
         
@@ -28,76 +113,36 @@ class TAgent(BaseAgent):
         """
         logger.info("T-Agent: Starting tumor staging analysis")
         
-        system_prompt = self.get_system_prompt()
-        user_message = f"""Analyze the following PET-CT radiology report and determine the T-stage for the primary lung tumor.
-
-REPORT TEXT:
-{report_text}
-
-Provide your analysis in JSON format as specified in the system prompt."""
+        user_message = self.build_user_message(report_text, context)
+        
+        cached_result, embedding = self.semantic_cache_lookup(report_text, context)
+        if cached_result is not None:
+            return self._reuse_cached_result(cached_result)
+        
+        t_stage_result = self.call_llm_validated(self.system_prompt, user_message)
+        result = self._finish_result(t_stage_result)
+        self.semantic_cache_store(embedding, context, result)
+        return result
+    
+    async def analyze_async(self, report_text: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async variant of analyze.
+        
+        Args:
+            report_text: Markdown text of the radiology report
+            context: Optional context (not used for T-Agent)
+            
+        Returns:
+            Dict containing T-stage result validated against TStageResult schema
+        """
+        logger.info("T-Agent: Starting tumor staging analysis")
         
-        import time
+        user_message = self.build_user_message(report_text, context)
         
-        max_retries = self.settings.max_retries
-        retry_delay = self.settings.retry_delay
+        cached_result, embedding = await self.semantic_cache_lookup_async(report_text, context)
+        if cached_result is not None:
+            return self._reuse_cached_result(cached_result)
         
-        for attempt in range(max_retries):
-            try:
-                # Request JSON response from Mistral
-                response_text = self.call_llm(
-                    system_prompt=system_prompt,
-                    user_message=user_message,
-                    response_format={"type": "json_object"}
-                )
-                
-                # Debug: Log raw response
-                logger.debug(f"T-Agent raw response (attempt {attempt + 1}): {response_text[:500]}")
-                
-                # Parse JSON response
-                result_dict = json.loads(response_text)
-                
-                # Debug: Log parsed dict
-                logger.debug(f"T-Agent parsed dict keys: {result_dict.keys()}")
-                logger.debug(f"T-Agent parsed dict: {json.dumps(result_dict, indent=2)}")
-                
-                # Normalize response before validation
-                normalized_dict = normalize_agent_response(result_dict.copy())
-                
-                # Validate against Pydantic model
-                t_stage_result = TStageResult(**normalized_dict)
-                
-                logger.info(f"T-Agent: Determined stage {t_stage_result.stage}")
-                return t_stage_result.model_dump()
-                
-            except json.JSONDecodeError as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"T-Agent: JSON parse failed (attempt {attempt + 1}/{max_retries}), retrying...")
-                    time.sleep(retry_delay * (2 ** attempt))
-                    continue
-                else:
-                    logger.error(f"T-Agent: Failed to parse JSON response after {max_retries} attempts: {e}")
-                    logger.error(f"T-Agent: Raw response was: {response_text}")
-                    raise ValueError(f"Invalid JSON response from T-Agent: {e}")
-            except ValidationError as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"T-Agent: Validation failed (attempt {attempt + 1}/{max_retries}), retrying LLM call...")
-                    logger.debug(f"Validation error: {str(e)[:200]}")
-                    if 'result_dict' in locals():
-                        logger.debug(f"Failed dict: {json.dumps(result_dict, indent=2)}")
-                    time.sleep(retry_delay * (2 ** attempt))
-                    continue
-                else:
-                    logger.error(f"T-Agent: Validation failed after {max_retries} attempts: {e}")
-                    if 'result_dict' in locals():
-                        logger.error(f"T-Agent: Parsed dict was: {json.dumps(result_dict, indent=2)}")
-                    raise ValueError(f"T-Agent validation error: {e}")
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning(f"T-Agent: Error (attempt {attempt + 1}/{max_retries}), retrying...")
-                    time.sleep(retry_delay * (2 ** attempt))
-                    continue
-                else:
-                    logger.error(f"T-Agent: Analysis failed after {max_retries} attempts: {e}")
-                    if 'result_dict' in locals():
-                        logger.error(f"T-Agent: Parsed dict was: {json.dumps(result_dict, indent=2)}")
-                    raise
+        t_stage_result = await self.call_llm_validated_async(self.system_prompt, user_message)
+        result = self._finish_result(t_stage_result)
+        await self.semantic_cache_store_async(embedding, context, result)
+        return result
@@ -5,21 +5,30 @@ RESTful API for automated TNM staging of lung cancer from PET-CT reports.
 """
 
 import os
+import asyncio
+import hashlib
 import tempfile
 import logging
+import uuid
+from contextlib import asynccontextmanager, nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+import httpx
+import orjson
 from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
-from pdf_to_markdown import MarkdownConverter, pdf_to_markdown_text
-from workflow import run_tnm_staging_workflow
+from pdf_to_markdown import CACHE_HASH_ALGORITHM, MarkdownConverter, pdf_to_markdown_text_async
+from workflow import run_tnm_staging_workflow_async
+from agents import BatchRunner, bypass_caches
 from models import TNMStaging
+from config import get_settings
 
 # Load environment variables
 load_dotenv()
@@ -31,8 +40,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+api_key = os.environ.get('MISTRAL_API_KEY')
+if not api_key:
+    logger.error("MISTRAL_API_KEY not found in environment")
+    raise ValueError("MISTRAL_API_KEY environment variable not set")
+
+# Mistral converter shared across requests; created in lifespan below
+converter: Optional[MarkdownConverter] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared converter and its pooled OCR HTTP client; close both on shutdown."""
+    global converter
+    get_settings()  # Parse settings once at startup
+    async_http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+        timeout=httpx.Timeout(120.0, connect=10.0)
+    )
+    try:
+        async with MarkdownConverter(api_key=api_key, async_http_client=async_http_client) as converter:
+            yield
+    finally:
+        await async_http_client.aclose()
+
+
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="TNM Staging API",
     description="Automated TNM staging for lung cancer from PET-CT radiology reports using AI",
     version="1.0.0",
@@ -54,14 +89,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Mistral converter (reuse across requests)
-api_key = os.environ.get('MISTRAL_API_KEY')
-if not api_key:
-    logger.error("MISTRAL_API_KEY not found in environment")
-    raise ValueError("MISTRAL_API_KEY environment variable not set")
-
-converter = MarkdownConverter(api_key=api_key)
-
+# Compress staging responses, whose evidence strings can run to tens of KB
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 # Response Models
 class HealthResponse(BaseModel):
@@ -76,12 +105,25 @@ class StagingRequest(BaseModel):
     patient_id: Optional[str] = Field(None, description="Optional patient identifier")
 
 
+class BatchStagingRequest(BaseModel):
+    reports: List[StagingRequest] = Field(..., min_length=1, description="Reports to stage")
+
+
 class ErrorResponse(BaseModel):
     error: str
     detail: Optional[str] = None
     timestamp: str
 
 
+def _copy_and_hash(src, dst, chunk_size: int = 1 << 20) -> str:
+    """Copy a file object in chunks, returning the cache-key hash of the bytes copied."""
+    hasher = hashlib.new(CACHE_HASH_ALGORITHM)
+    while chunk := src.read(chunk_size):
+        hasher.update(chunk)
+        dst.write(chunk)
+    return hasher.hexdigest()
+
+
 # API Endpoints
 
 @app.get("/", response_model=HealthResponse)
@@ -109,6 +151,7 @@ async def stage_from_pdf(
     file: UploadFile = File(..., description="PET-CT report PDF file"),
     report_id: Optional[str] = None,
     patient_id: Optional[str] = None,
+    no_cache: bool = False,
     background_tasks: BackgroundTasks = None
 ):
     """
@@ -118,6 +161,7 @@ async def stage_from_pdf(
         file: PDF file upload
         report_id: Optional report identifier
         patient_id: Optional patient identifier
+        no_cache: Skip cached OCR conversions and LLM results (they are refreshed)
         
     Returns:
         Complete TNM staging results
@@ -131,25 +175,28 @@ async def stage_from_pdf(
     
     temp_pdf_path = None
     try:
-        # Save uploaded file to temporary location
+        # Stream the upload to a temporary file in 1 MiB chunks off the event loop,
+        # hashing as we go so the markdown cache lookup needs no second read
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_pdf:
-            content = await file.read()
-            temp_pdf.write(content)
             temp_pdf_path = temp_pdf.name
+            file_hash = await asyncio.to_thread(_copy_and_hash, file.file, temp_pdf)
         
         logger.info(f"Processing PDF: {file.filename}")
         
         # Step 1: Convert PDF to Markdown
         logger.info("Converting PDF to markdown...")
-        markdown_text = pdf_to_markdown_text(temp_pdf_path, converter, with_images=False)
+        markdown_text = await pdf_to_markdown_text_async(
+            temp_pdf_path, converter, with_images=False, file_hash=file_hash, refresh_cache=no_cache
+        )
         
         # Step 2: Run TNM staging workflow
         logger.info("Running TNM staging analysis...")
-        result = run_tnm_staging_workflow(
-            report_text=markdown_text,
-            report_id=report_id or file.filename,
-            patient_id=patient_id
-        )
+        with bypass_caches() if no_cache else nullcontext():
+            result = await run_tnm_staging_workflow_async(
+                report_text=markdown_text,
+                report_id=report_id or file.filename,
+                patient_id=patient_id
+            )
         
         if not result.get("success"):
             logger.error(f"Staging failed: {result.get('error')}")
@@ -182,12 +229,13 @@ async def stage_from_pdf(
 
 
 @app.post("/api/v1/stage/text", response_model=dict)
-async def stage_from_text(request: StagingRequest):
+async def stage_from_text(request: StagingRequest, no_cache: bool = False):
     """
     Process markdown text of a PET-CT report and return TNM staging.
     
     Args:
         request: Staging request with markdown text
+        no_cache: Skip cached LLM results (they are refreshed)
         
     Returns:
         Complete TNM staging results
@@ -196,11 +244,12 @@ async def stage_from_text(request: StagingRequest):
         logger.info(f"Processing text staging for report: {request.report_id}")
         
         # Run TNM staging workflow
-        result = run_tnm_staging_workflow(
-            report_text=request.report_text,
-            report_id=request.report_id,
-            patient_id=request.patient_id
-        )
+        with bypass_caches() if no_cache else nullcontext():
+            result = await run_tnm_staging_workflow_async(
+                report_text=request.report_text,
+                report_id=request.report_id,
+                patient_id=request.patient_id
+            )
         
         if not result.get("success"):
             logger.error(f"Staging failed: {result.get('error')}")
@@ -222,6 +271,118 @@ async def stage_from_text(request: StagingRequest):
         )
 
 
+def _batch_job_path(job_id: str) -> Path:
+    """Path of the status record for a batch staging job."""
+    return Path(get_settings().batch_jobs_dir) / f"{job_id}.json"
+
+
+def _write_batch_job(job_id: str, record: dict) -> None:
+    """Atomically write a batch job's status record, readable by every worker process."""
+    path = _batch_job_path(job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(orjson.dumps(record))
+    os.replace(tmp_path, path)
+
+
+def _read_batch_job(job_id: str) -> Optional[dict]:
+    """Read a batch job's status record, or None if the job is unknown."""
+    try:
+        return orjson.loads(_batch_job_path(job_id).read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def _format_batch_results(report_ids: List[str], reports: List[StagingRequest], batch_results: dict) -> List[dict]:
+    """Shape BatchRunner.stage_reports output like the per-report staging responses."""
+    results = []
+    for report_id, item in zip(report_ids, reports):
+        staged = batch_results[report_id]
+        if staged["final_staging"]:
+            results.append({
+                "success": True,
+                "staging": staged["final_staging"],
+                "report_id": report_id,
+                "patient_id": item.patient_id
+            })
+        else:
+            results.append({
+                "success": False,
+                "error": staged["error"] or "Staging incomplete",
+                "report_id": report_id,
+                "patient_id": item.patient_id,
+                "partial_results": {
+                    "t_result": staged["t_result"],
+                    "n_result": staged["n_result"],
+                    "m_result": staged["m_result"]
+                }
+            })
+    return results
+
+
+async def _run_batch_job(job_id: str, report_ids: List[str], reports: List[StagingRequest], record: dict) -> None:
+    """Stage a batch in the background and record the outcome for the status endpoint."""
+    try:
+        batch_results = await asyncio.to_thread(
+            BatchRunner().stage_reports,
+            {report_id: item.report_text for report_id, item in zip(report_ids, reports)}
+        )
+        results = _format_batch_results(report_ids, reports, batch_results)
+        logger.info(f"Batch {job_id} staged {sum(1 for r in results if r['success'])}/{len(results)} reports")
+        record.update(status="completed", results=results)
+    except Exception as e:
+        logger.error(f"Error in batch staging job {job_id}: {str(e)}", exc_info=True)
+        record.update(status="failed", error=str(e))
+    record["finished_at"] = datetime.now().isoformat()
+    await asyncio.to_thread(_write_batch_job, job_id, record)
+
+
+@app.post("/api/v1/stage/batch", response_model=dict, status_code=202)
+async def stage_batch(request: BatchStagingRequest, background_tasks: BackgroundTasks):
+    """
+    Submit many markdown reports for offline staging through the Mistral Batch API.
+    
+    Batch jobs are cheaper and not rate limited like synchronous calls, but
+    can take minutes to complete, so this returns a job ID at once; poll
+    GET /api/v1/stage/batch/{job_id} for the results. Use /api/v1/stage/text
+    for interactive use.
+    
+    Args:
+        request: Reports to stage; report_id defaults to the report's position
+        
+    Returns:
+        The job ID and its initial status
+    """
+    report_ids = [item.report_id or f"report-{i}" for i, item in enumerate(request.reports)]
+    if len(set(report_ids)) != len(report_ids):
+        raise HTTPException(status_code=400, detail="report_id values must be unique within a batch")
+    
+    job_id = uuid.uuid4().hex
+    record = {"job_id": job_id, "status": "running", "submitted_at": datetime.now().isoformat()}
+    await asyncio.to_thread(_write_batch_job, job_id, record)
+    logger.info(f"Submitted batch staging job {job_id} for {len(report_ids)} reports")
+    background_tasks.add_task(_run_batch_job, job_id, report_ids, request.reports, dict(record))
+    return record
+
+
+@app.get("/api/v1/stage/batch/{job_id}", response_model=dict)
+async def get_batch_status(job_id: uuid.UUID):
+    """
+    Get the status of a batch staging job.
+    
+    Args:
+        job_id: Job ID returned by POST /api/v1/stage/batch
+        
+    Returns:
+        The job record; once status is "completed" it holds per-report
+        staging results in request order, and once "failed" an error
+    """
+    record = await asyncio.to_thread(_read_batch_job, job_id.hex)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown batch job {job_id.hex}")
+    return record
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
@@ -239,11 +400,16 @@ async def global_exception_handler(request, exc):
 if __name__ == "__main__":
     import uvicorn
     
-    # Run the FastAPI app
+    # Run the FastAPI app on uvloop + httptools (installed with uvicorn[standard]).
+    # Set UVICORN_RELOAD=true for development; reload runs a single worker.
+    reload = os.environ.get("UVICORN_RELOAD", "false").lower() == "true"
     uvicorn.run(
         "app:app",
         host="0.0.0.0",
         port=8022,
-        reload=True,
+        loop="uvloop",
+        http="httptools",
+        reload=reload,
+        workers=1 if reload else max(1, (os.cpu_count() or 2) // 2),
         log_level="info"
     )
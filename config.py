@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from typing import Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
@@ -20,10 +21,35 @@ class Settings(BaseSettings):
     mistral_model: str = Field(default="mistral-large-latest", env='MISTRAL_MODEL')
     temperature: float = Field(default=0.1, env='TEMPERATURE')  # Low temperature for medical accuracy
     max_tokens: int = Field(default=4096, env='MAX_TOKENS')
+    # Per-agent overrides: compact T/N/M extraction vs. the Staging Compiler summary
+    model_extract: str = Field(default="mistral-small-latest", env='MODEL_EXTRACT')
+    max_tokens_extract: int = Field(default=1024, env='MAX_TOKENS_EXTRACT')
+    model_compile: str = Field(default="mistral-large-latest", env='MODEL_COMPILE')
+    max_tokens_compile: int = Field(default=2048, env='MAX_TOKENS_COMPILE')
+    combined_agent_enabled: bool = Field(default=False, env='COMBINED_AGENT_ENABLED')  # One T/N/M call per report
     
     # Retry Configuration
     max_retries: int = Field(default=3, env='MAX_RETRIES')
     retry_delay: float = Field(default=1.0, env='RETRY_DELAY')
+    retry_max_delay: float = Field(default=30.0, env='RETRY_MAX_DELAY')  # Cap for backoff and Retry-After
+    
+    # Batch Configuration
+    batch_size: int = Field(default=8, env='BATCH_SIZE')  # Reports per batched LLM call
+    max_concurrency: int = Field(default=48, env='MAX_CONCURRENCY')  # Reports staged at once by AsyncAgentPool
+    max_concurrent_llm: int = Field(default=16, env='MAX_CONCURRENT_LLM')  # Async LLM requests in flight per event loop
+    batch_timeout: float = Field(default=3600.0, env='BATCH_TIMEOUT')  # Seconds BatchRunner waits for each Batch API job
+    batch_jobs_dir: str = Field(default=".batch_jobs", env='BATCH_JOBS_DIR')  # Status records for /api/v1/stage/batch jobs
+    
+    # LLM Response Cache (keyed by model, sampling settings and prompt hash)
+    enable_llm_cache: bool = Field(default=False, env='ENABLE_LLM_CACHE')
+    llm_cache_dir: str = Field(default=".llm_cache", env='LLM_CACHE_DIR')
+    llm_cache_ttl: Optional[int] = Field(default=None, env='LLM_CACHE_TTL')  # Seconds; None = never expire
+    
+    # Semantic Cache (reuse results for near-duplicate reports via embeddings)
+    semantic_cache_enabled: bool = Field(default=False, env='SEMANTIC_CACHE_ENABLED')
+    semantic_cache_dir: str = Field(default=".semantic_cache", env='SEMANTIC_CACHE_DIR')
+    semantic_cache_model: str = Field(default="mistral-embed", env='SEMANTIC_CACHE_MODEL')
+    semantic_cache_threshold: float = Field(default=0.95, env='SEMANTIC_CACHE_THRESHOLD')  # Cosine similarity
     
     # Timeout Configuration
     api_timeout: int = Field(default=60, env='API_TIMEOUT')
@@ -35,6 +61,10 @@ class Settings(BaseSettings):
 
 
 # Global settings instance
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings instance."""
+    """Get the application settings, parsed once per process.
+    
+    Call get_settings.cache_clear() to re-read the environment (e.g., in tests).
+    """
     return Settings()
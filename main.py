@@ -6,25 +6,26 @@ It provides a CLI interface for processing PET-CT PDF reports.
 """
 
 import argparse
-import json
+import functools
 import logging
+import os
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from datetime import datetime
 
 try:
-    from dotenv import load_dotenv
     from rich.console import Console
     from rich.logging import RichHandler
-    from rich.progress import Progress, SpinnerColumn, TextColumn
     from rich.panel import Panel
 except ImportError:
     print("Error: Required packages not installed. Please run: pip install -r requirements.txt")
     sys.exit(1)
 
-from pdf_to_markdown import MarkdownConverter, pdf_to_markdown_text
-from workflow import run_tnm_staging_workflow
+# Heavier modules (workflow/agents, OCR converter, jinja2, dotenv, rich.progress)
+# are imported where first used so --help and argument errors return quickly
+if TYPE_CHECKING:
+    from pdf_to_markdown import MarkdownConverter
 
 # Initialize Rich console
 console = Console()
@@ -38,6 +39,31 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def get_report_template():
+    """Compile the markdown staging report template once."""
+    from jinja2 import Environment, FileSystemLoader
+    
+    return Environment(
+        loader=FileSystemLoader(Path(__file__).parent / "templates"),
+        trim_blocks=True,
+        lstrip_blocks=True
+    ).get_template("staging_report.md.j2")
+
+
+@functools.cache
+def get_converter() -> "MarkdownConverter":
+    """Create the MarkdownConverter once so every PDF reuses its HTTP connections."""
+    from dotenv import load_dotenv
+    from pdf_to_markdown import MarkdownConverter
+    
+    load_dotenv()
+    api_key = os.environ.get('MISTRAL_API_KEY')
+    if not api_key:
+        raise ValueError("MISTRAL_API_KEY not found in environment")
+    return MarkdownConverter(api_key=api_key)
+
+
 def generate_markdown_report(staging_result: dict, report_id: Optional[str] = None) -> str:
     """Generate a human-readable markdown report from staging results.
     
@@ -49,131 +75,14 @@ def generate_markdown_report(staging_result: dict, report_id: Optional[str] = No
         Formatted markdown report
     """
     staging = staging_result.get("staging", {})
-    
-    report_lines = [
-        "# TNM Staging Report",
-        "",
-        f"**Report Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-    ]
-    
-    if report_id:
-        report_lines.append(f"**Report ID:** {report_id}")
-    
-    report_lines.extend([
-        "",
-        "---",
-        "",
-        "## Final Staging",
-        "",
-        f"**TNM Stage:** `{staging.get('tnm_stage', 'N/A')}`  ",
-        f"**Overall Stage:** `{staging.get('overall_stage', 'N/A')}`  ",
-        f"**Prefix:** `{staging.get('clinical_stage_prefix', 'c')}`TNM",
-        "",
-        "### Summary",
-        "",
-        staging.get('summary', 'No summary available'),
-        "",
-        "---",
-        "",
-        "## Component Details",
-        "",
-        "### T-Stage (Tumor)"
-    ])
-    
-    tumor = staging.get('tumor', {})
-    report_lines.extend([
-        "",
-        f"**Stage:** {tumor.get('stage', 'N/A')}  ",
-        f"**Size:** {tumor.get('tumor_size_mm', 'N/A')} mm  " if tumor.get('tumor_size_mm') else "",
-        f"**Location:** {tumor.get('location', 'N/A')}  ",
-        f"**Laterality:** {tumor.get('laterality', 'N/A')}  ",
-        f"**Confidence:** {tumor.get('confidence', 'N/A')}",
-        "",
-        "**Invasion:**"
-    ])
-    
-    invasion = tumor.get('invasion', [])
-    if invasion:
-        for inv in invasion:
-            report_lines.append(f"- {inv}")
-    else:
-        report_lines.append("- None identified")
-    
-    report_lines.extend([
-        "",
-        "**Separate Nodules:**"
-    ])
-    
-    nodules = tumor.get('separate_nodules', [])
-    if nodules:
-        for nodule in nodules:
-            report_lines.append(f"- {nodule}")
-    else:
-        report_lines.append("- None identified")
-    
-    report_lines.extend([
-        "",
-        "**Evidence:**",
-        "",
-        f"> {tumor.get('evidence', 'No evidence provided')}",
-        "",
-        "### N-Stage (Lymph Nodes)",
-        ""
-    ])
-    
-    nodes = staging.get('nodes', {})
-    report_lines.extend([
-        f"**Stage:** {nodes.get('stage', 'N/A')}  ",
-        f"**Confidence:** {nodes.get('confidence', 'N/A')}",
-        "",
-        "**Involved Nodes:**"
-    ])
-    
-    involved_nodes = nodes.get('involved_nodes', [])
-    if involved_nodes:
-        for node in involved_nodes:
-            report_lines.append(f"- Station {node.get('station', 'N/A')} ({node.get('laterality', 'N/A')}): {node.get('description', '')}")
-    else:
-        report_lines.append("- No pathologic nodes identified")
-    
-    report_lines.extend([
-        "",
-        "**Evidence:**",
-        "",
-        f"> {nodes.get('evidence', 'No evidence provided')}",
-        "",
-        "### M-Stage (Metastasis)",
-        ""
-    ])
-    
-    metastasis = staging.get('metastasis', {})
-    report_lines.extend([
-        f"**Stage:** {metastasis.get('stage', 'N/A')}  ",
-        f"**Organ Systems Involved:** {metastasis.get('organ_systems_count', 0)}  ",
-        f"**Confidence:** {metastasis.get('confidence', 'N/A')}",
-        "",
-        "**Metastatic Sites:**"
-    ])
-    
-    met_sites = metastasis.get('metastasis_sites', [])
-    if met_sites:
-        for site in met_sites:
-            report_lines.append(f"- {site.get('organ_system', 'N/A')}: {site.get('location', '')} - {site.get('description', '')}")
-    else:
-        report_lines.append("- No distant metastases identified")
-    
-    report_lines.extend([
-        "",
-        "**Evidence:**",
-        "",
-        f"> {metastasis.get('evidence', 'No evidence provided')}",
-        "",
-        "---",
-        "",
-        "*Report generated by TNM Staging AI System using TNM 9th Edition guidelines*"
-    ])
-    
-    return "\n".join(report_lines)
+    return get_report_template().render(
+        staging=staging,
+        tumor=staging.get('tumor', {}),
+        nodes=staging.get('nodes', {}),
+        metastasis=staging.get('metastasis', {}),
+        report_id=report_id,
+        generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    )
 
 
 def process_pdf_report(
@@ -193,6 +102,11 @@ def process_pdf_report(
     Returns:
         Staging result dictionary
     """
+    import orjson
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from pdf_to_markdown import pdf_to_markdown_text
+    from workflow import run_tnm_staging_workflow
+    
     if output_dir is None:
         output_dir = pdf_path.parent
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -209,14 +123,7 @@ def process_pdf_report(
         task = progress.add_task("[cyan]Converting PDF to markdown...", total=None)
         
         try:
-            load_dotenv()
-            import os
-            api_key = os.environ.get('MISTRAL_API_KEY')
-            if not api_key:
-                raise ValueError("MISTRAL_API_KEY not found in environment")
-            
-            converter = MarkdownConverter(api_key=api_key)
-            markdown_text = pdf_to_markdown_text(str(pdf_path), converter, with_images=False)
+            markdown_text = pdf_to_markdown_text(str(pdf_path), get_converter(), with_images=False)
             
             # Save intermediate markdown
             md_path = output_dir / f"{base_name}_report.md"
@@ -255,8 +162,7 @@ def process_pdf_report(
     # Step 3: Save outputs
     if save_json:
         json_path = output_dir / f"{base_name}_staging.json"
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2)
+        json_path.write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2))
         console.print(f"[green]✓ Saved JSON output: {json_path}")
     
     if save_markdown:
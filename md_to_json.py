@@ -1,97 +1,314 @@
 import os
-import json
+import asyncio
+import orjson
 import argparse
 import logging
 import time
-from typing import Dict, Any, List
+import weakref
+from typing import Callable, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
+import httpx
 from mistralai import Mistral
+from mistralai.extra import response_format_from_pydantic_model
+from mistralai.models import ResponseFormat
+from pydantic import create_model
 from therapy_models import TherapyReport
 from rad_models import RadiationTherapyReport
 from langsmith import traceable
+from pdf_to_markdown import HTTP2_ENABLED, HTTP_LIMITS, HTTP_TIMEOUT
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Global client instance to reuse across calls
+# Schemas and system prompts are invariant, so build them once at import; the
+# system message comes first and is byte-identical across calls, so providers
+# can reuse the prefilled prefix
+_THERAPY_SCHEMA = TherapyReport.model_json_schema()
+_RADIATION_SCHEMA = RadiationTherapyReport.model_json_schema()
+_THERAPY_SCHEMA_JSON = orjson.dumps(_THERAPY_SCHEMA, option=orjson.OPT_INDENT_2).decode()
+_RADIATION_SCHEMA_JSON = orjson.dumps(_RADIATION_SCHEMA, option=orjson.OPT_INDENT_2).decode()
+
+# Output cap for one report; schema-constrained output stays well under it.
+# A response cut off at the cap is retried once with the larger cap.
+EXTRACTION_MAX_TOKENS = 1500
+EXTRACTION_RETRY_MAX_TOKENS = 4000
+
+# Strict json_schema formats (every object closed with additionalProperties: false)
+# so decoding is constrained to the report models
+_THERAPY_RESPONSE_FORMAT = response_format_from_pydantic_model(TherapyReport)
+_RADIATION_RESPONSE_FORMAT = response_format_from_pydantic_model(RadiationTherapyReport)
+_THERAPY_BATCH_RESPONSE_FORMAT = response_format_from_pydantic_model(
+    create_model("TherapyReports", reports=(List[TherapyReport], ...))
+)
+_RADIATION_BATCH_RESPONSE_FORMAT = response_format_from_pydantic_model(
+    create_model("RadiationTherapyReports", reports=(List[RadiationTherapyReport], ...))
+)
+
+_THERAPY_NOTES = """Important notes:
+- therapy_type should be one of: 'Chemotherapy', 'Biological Therapy', 'Targeted Therapy', 'Hormonal Therapy', 'Immunotherapy'
+- administration_route examples: 'Intravenous', 'Oral', 'Subcutaneous', 'Intramuscular'
+- Extract all drugs mentioned for cancer treatment only with their dosages and units
+- Convert dates to YYYY-MM-DD format
+- Set adverse_event_observed to true if any side effects or adverse events are mentioned"""
+
+_THERAPY_SYSTEM_PROMPT = f"""Extract structured therapy report data from the markdown report in the user message. This could be a chemotherapy, biological therapy, or hormonal therapy report. Return only a JSON object conforming to this schema:
+
+{_THERAPY_SCHEMA_JSON}
+
+{_THERAPY_NOTES}"""
+
+_RADIATION_NOTES = """Important notes:
+- radiation_type examples: 'EBRT' (External Beam Radiation Therapy), 'IMRT', 'IGRT', 'Stereotactic', 'Brachytherapy'
+- test_therapy should typically be 'therapy' for radiation therapy reports
+- Convert dates to YYYY-MM-DD format
+- Extract total dosage and unit (commonly 'Gy' for Gray)
+- area_treated should specify the anatomical region (e.g., 'Spine', 'Brain', 'Chest', 'Pelvis')
+- Include any adverse events or side effects mentioned
+- Extract number of fractions (treatment sessions)"""
+
+_RADIATION_SYSTEM_PROMPT = f"""Extract structured radiation therapy report data from the markdown report in the user message. Return only a JSON object conforming to this schema:
+
+{_RADIATION_SCHEMA_JSON}
+
+{_RADIATION_NOTES}"""
+
+# Reports per combined call; larger batches stop paying off as output grows
+DEFAULT_BATCH_SIZE = 6
+
+# Global client instance to reuse across calls; async calls get one per event
+# loop, since pooled async connections cannot be shared across asyncio.run calls
 _mistral_client = None
+_loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Mistral]" = weakref.WeakKeyDictionary()
 
 def get_mistral_client():
-    """Get or create a global Mistral client instance."""
+    """Get or create the Mistral client for the current context."""
     global _mistral_client
-    if _mistral_client is None:
-        api_key = os.environ.get("MISTRAL_API_KEY")
-        if not api_key:
-            raise ValueError("MISTRAL_API_KEY environment variable not set.")
-        _mistral_client = Mistral(api_key=api_key)
-    return _mistral_client
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is None and _mistral_client is not None:
+        return _mistral_client
+    if loop is not None and loop in _loop_clients:
+        return _loop_clients[loop]
 
-@traceable(
-    run_type="llm",
-    name="therapy_extraction",
-    tags=["therapy", "medical_report", "mistral"],
-    metadata={"model": "mistral-medium-latest", "report_type": "therapy"}
-)
-def get_therapy_json(markdown_text: str) -> dict:
+    api_key = os.environ.get("MISTRAL_API_KEY")
+    if not api_key:
+        raise ValueError("MISTRAL_API_KEY environment variable not set.")
+    if loop is None:
+        client = Mistral(api_key=api_key, client=httpx.Client(
+            http2=HTTP2_ENABLED, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT))
+    else:
+        client = Mistral(api_key=api_key, async_client=httpx.AsyncClient(
+            http2=HTTP2_ENABLED, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT))
+    if loop is None:
+        _mistral_client = client
+    else:
+        _loop_clients[loop] = client
+    return client
+
+def _extraction_messages(system_prompt: str, markdown_text: str) -> List[Dict[str, str]]:
+    """Build the chat messages for one report extraction."""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"Report:\n{markdown_text}"}
+    ]
+
+def _parse_extraction(
+    response_content: Optional[str],
+    messages: List[Dict[str, str]],
+    report_label: str,
+    attempt: int
+) -> Tuple[Optional[dict], List[Dict[str, str]]]:
     """
-    Converts markdown text from a therapy (chemotherapy/biological) report to a structured JSON object.
+    Parses one extraction response, or builds the correction request for a retry.
     
     Args:
-        markdown_text: The markdown content of the therapy report.
+        response_content: Message content returned by the chat call.
+        messages: Messages sent for this attempt.
+        report_label: Report kind used in logs (e.g. "therapy").
+        attempt: Zero-based attempt number; only the first attempt is retried.
     
     Returns:
-        A dictionary with the structured therapy data.
+        (result, messages): result is None when the caller should retry with the
+        returned messages, and {} for an empty response.
     """
-    client = get_mistral_client()
-    model = "mistral-medium-latest"
+    if not response_content:
+        logging.error("Empty response from Mistral API")
+        return {}, messages
+    try:
+        return orjson.loads(response_content), messages
+    except orjson.JSONDecodeError:
+        if attempt:
+            raise
+        # e.g. output truncated at max_tokens; ask once for a corrected object
+        logging.warning(f"Invalid {report_label} JSON from Mistral API, requesting a correction")
+        return None, messages + [
+            {"role": "assistant", "content": response_content},
+            {"role": "user", "content": "That response was not valid JSON. Return only the corrected JSON object conforming to the schema."}
+        ]
+
+def _extract_sync(
+    system_prompt: str,
+    response_format: ResponseFormat,
+    report_label: str,
+    markdown_text: str
+) -> dict:
+    """
+    Runs one structured extraction chat call for a report on the shared sync client.
     
-    schema = TherapyReport.model_json_schema()
+    Args:
+        system_prompt: Invariant instructions (task, schema and notes) for the report type.
+        response_format: json_schema response format for the report type.
+        report_label: Report kind used in logs (e.g. "therapy").
+        markdown_text: The markdown content of the report.
     
-    prompt = f"""Extract structured therapy report data from this markdown text. This could be a chemotherapy, biological therapy, or hormonal therapy report. Return only a JSON object conforming to this schema:
-
-{json.dumps(schema, indent=2)}
-
-Important notes:
-- therapy_type should be one of: 'Chemotherapy', 'Biological Therapy', 'Targeted Therapy', 'Hormonal Therapy', 'Immunotherapy'
-- administration_route examples: 'Intravenous', 'Oral', 'Subcutaneous', 'Intramuscular'
-- Extract all drugs mentioned for cancer treatment only with their dosages and units
-- Convert dates to YYYY-MM-DD format
-- Set adverse_event_observed to true if any side effects or adverse events are mentioned
+    Returns:
+        A dictionary with the structured data, or {} on failure.
+    """
+    client = get_mistral_client()
+    model = "mistral-medium-latest"
+    messages = _extraction_messages(system_prompt, markdown_text)
 
-Report:
-{markdown_text}"""
+    start_time = time.time()
+    try:
+        print(f"[🔄] Starting {report_label} JSON extraction with {model}...")
+        
+        for attempt in range(2):
+            for max_tokens in (EXTRACTION_MAX_TOKENS, EXTRACTION_RETRY_MAX_TOKENS):
+                chat_response = client.chat.complete(
+                    model=model,
+                    messages=messages,  # type: ignore
+                    response_format=response_format,
+                    max_tokens=max_tokens,
+                    temperature=0.1
+                )
+                if chat_response.choices[0].finish_reason != "length" or max_tokens == EXTRACTION_RETRY_MAX_TOKENS:
+                    break
+                logging.warning(f"{report_label.capitalize()} JSON truncated at {max_tokens} tokens, retrying with {EXTRACTION_RETRY_MAX_TOKENS}")
+            
+            result, messages = _parse_extraction(
+                chat_response.choices[0].message.content, messages, report_label, attempt  # type: ignore
+            )
+            if result is None:
+                continue
+            if result:
+                elapsed_time = time.time() - start_time
+                print(f"[✅] {report_label.capitalize()} JSON extraction completed in {elapsed_time:.2f} seconds")
+            return result
+    except Exception as e:
+        elapsed_time = time.time() - start_time
+        logging.error(f"Failed to get {report_label} data from Mistral API after {elapsed_time:.2f}s: {e}")
+        return {}
 
-    messages: List[Dict[str, str]] = [
-        {"role": "user", "content": prompt}
-    ]
+async def _extract(
+    system_prompt: str,
+    response_format: ResponseFormat,
+    report_label: str,
+    markdown_text: str
+) -> dict:
+    """
+    Async variant of _extract_sync, on the current event loop's client.
+    
+    Args:
+        system_prompt: Invariant instructions (task, schema and notes) for the report type.
+        response_format: json_schema response format for the report type.
+        report_label: Report kind used in logs (e.g. "therapy").
+        markdown_text: The markdown content of the report.
+    
+    Returns:
+        A dictionary with the structured data, or {} on failure.
+    """
+    client = get_mistral_client()
+    model = "mistral-medium-latest"
+    messages = _extraction_messages(system_prompt, markdown_text)
 
     start_time = time.time()
     try:
-        print(f"[🔄] Starting therapy JSON extraction with {model}...")
+        print(f"[🔄] Starting {report_label} JSON extraction with {model}...")
         
-        chat_response = client.chat.complete(
-            model=model,
-            messages=messages,  # type: ignore
-            response_format={"type": "json_object"},
-            max_tokens=4000,
-            temperature=0.1
-        )
-        
-        response_content = chat_response.choices[0].message.content  # type: ignore
-        if response_content:
-            result = json.loads(response_content)  # type: ignore
-            elapsed_time = time.time() - start_time
-            print(f"[✅] Therapy JSON extraction completed in {elapsed_time:.2f} seconds")
+        for attempt in range(2):
+            for max_tokens in (EXTRACTION_MAX_TOKENS, EXTRACTION_RETRY_MAX_TOKENS):
+                chat_response = await client.chat.complete_async(
+                    model=model,
+                    messages=messages,  # type: ignore
+                    response_format=response_format,
+                    max_tokens=max_tokens,
+                    temperature=0.1
+                )
+                if chat_response.choices[0].finish_reason != "length" or max_tokens == EXTRACTION_RETRY_MAX_TOKENS:
+                    break
+                logging.warning(f"{report_label.capitalize()} JSON truncated at {max_tokens} tokens, retrying with {EXTRACTION_RETRY_MAX_TOKENS}")
+            
+            result, messages = _parse_extraction(
+                chat_response.choices[0].message.content, messages, report_label, attempt  # type: ignore
+            )
+            if result is None:
+                continue
+            if result:
+                elapsed_time = time.time() - start_time
+                print(f"[✅] {report_label.capitalize()} JSON extraction completed in {elapsed_time:.2f} seconds")
             return result
-        else:
-            logging.error("Empty response from Mistral API")
-            return {}
     except Exception as e:
         elapsed_time = time.time() - start_time
-        logging.error(f"Failed to get therapy data from Mistral API after {elapsed_time:.2f}s: {e}")
+        logging.error(f"Failed to get {report_label} data from Mistral API after {elapsed_time:.2f}s: {e}")
         return {}
 
+@traceable(
+    run_type="llm",
+    name="therapy_extraction",
+    tags=["therapy", "medical_report", "mistral"],
+    metadata={"model": "mistral-medium-latest", "report_type": "therapy"}
+)
+async def aget_therapy_json(markdown_text: str) -> dict:
+    """
+    Converts markdown text from a therapy (chemotherapy/biological) report to a structured JSON object.
+    
+    Args:
+        markdown_text: The markdown content of the therapy report.
+    
+    Returns:
+        A dictionary with the structured therapy data.
+    """
+    return await _extract(_THERAPY_SYSTEM_PROMPT, _THERAPY_RESPONSE_FORMAT, "therapy", markdown_text)
+
+@traceable(
+    run_type="llm",
+    name="radiation_extraction",
+    tags=["radiation", "medical_report", "mistral"],
+    metadata={"model": "mistral-medium-latest", "report_type": "radiation"}
+)
+async def aget_radiation_json(markdown_text: str) -> dict:
+    """
+    Converts markdown text from a radiation therapy report to a structured JSON object.
+    
+    Args:
+        markdown_text: The markdown content of the radiation therapy report.
+    
+    Returns:
+        A dictionary with the structured radiation therapy data.
+    """
+    return await _extract(_RADIATION_SYSTEM_PROMPT, _RADIATION_RESPONSE_FORMAT, "radiation therapy", markdown_text)
+
+@traceable(
+    run_type="llm",
+    name="therapy_extraction",
+    tags=["therapy", "medical_report", "mistral"],
+    metadata={"model": "mistral-medium-latest", "report_type": "therapy"}
+)
+def get_therapy_json(markdown_text: str) -> dict:
+    """
+    Converts markdown text from a therapy (chemotherapy/biological) report to a structured JSON object.
+    
+    Args:
+        markdown_text: The markdown content of the therapy report.
+    
+    Returns:
+        A dictionary with the structured therapy data.
+    """
+    return _extract_sync(_THERAPY_SYSTEM_PROMPT, _THERAPY_RESPONSE_FORMAT, "therapy", markdown_text)
+
 @traceable(
     run_type="llm",
     name="radiation_extraction",
@@ -108,66 +325,302 @@ def get_radiation_json(markdown_text: str) -> dict:
     Returns:
         A dictionary with the structured radiation therapy data.
     """
+    return _extract_sync(_RADIATION_SYSTEM_PROMPT, _RADIATION_RESPONSE_FORMAT, "radiation therapy", markdown_text)
+
+async def extract_all(markdown_text: str) -> Dict[str, dict]:
+    """
+    Extracts therapy and radiation data from one report concurrently.
+    
+    Args:
+        markdown_text: The markdown content of the report.
+    
+    Returns:
+        A dictionary with "therapy" and "radiation" results.
+    """
+    therapy, radiation = await asyncio.gather(aget_therapy_json(markdown_text), aget_radiation_json(markdown_text))
+    return {"therapy": therapy, "radiation": radiation}
+
+def _get_json_batch(
+    texts: List[str],
+    report_label: str,
+    schema_json: str,
+    response_format: ResponseFormat,
+    notes: str,
+    single_fn: Callable[[str], dict],
+    batch_size: int
+) -> List[dict]:
+    """
+    Extracts structured data from several reports with one chat call per batch.
+    
+    Each batch of reports is sent as one delimited prompt asking for a
+    {"reports": [...]} object. If a batch response cannot be parsed or has the
+    wrong number of entries, that batch falls back to one call per report.
+    
+    Args:
+        texts: Markdown contents of the reports.
+        report_label: Report kind used in the prompt and logs (e.g. "therapy").
+        schema_json: JSON schema string each entry must conform to.
+        response_format: json_schema response format for the {"reports": [...]} object.
+        notes: Extraction notes for this report kind.
+        single_fn: Per-report extraction function used as the fallback.
+        batch_size: Maximum number of reports per call.
+    
+    Returns:
+        A list of dictionaries, one per input report, in input order.
+    """
     client = get_mistral_client()
     model = "mistral-medium-latest"
+    results: List[dict] = []
+    system_prompt = f"""Extract structured {report_label} report data from each of the delimited markdown reports in the user message. Return only a JSON object of the form {{"reports": [...]}} with exactly one entry per report, in report order, each conforming to this schema:
+
+{schema_json}
+
+{notes}"""
+
+    for offset in range(0, len(texts), batch_size):
+        batch = texts[offset:offset + batch_size]
+        if len(batch) == 1:
+            results.append(single_fn(batch[0]))
+            continue
+
+        reports = "\n".join(f"===REPORT {i}===\n{text}" for i, text in enumerate(batch, 1))
+        messages: List[Dict[str, str]] = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"{len(batch)} reports:\n\n{reports}"}
+        ]
+
+        start_time = time.time()
+        try:
+            print(f"[🔄] Starting batched {report_label} JSON extraction of {len(batch)} reports with {model}...")
+            
+            chat_response = client.chat.complete(
+                model=model,
+                messages=messages,  # type: ignore
+                response_format=response_format,
+                max_tokens=EXTRACTION_MAX_TOKENS * len(batch),
+                temperature=0.1
+            )
+            
+            response_content = chat_response.choices[0].message.content  # type: ignore
+            entries = orjson.loads(response_content)["reports"]  # type: ignore
+            if not isinstance(entries, list) or len(entries) != len(batch):
+                raise ValueError(f"expected {len(batch)} reports, got {len(entries) if isinstance(entries, list) else type(entries).__name__}")
+            elapsed_time = time.time() - start_time
+            print(f"[✅] Batched {report_label} JSON extraction completed in {elapsed_time:.2f} seconds")
+            results.extend(entry if isinstance(entry, dict) else {} for entry in entries)
+        except Exception as e:
+            logging.warning(f"Batched {report_label} extraction failed, falling back to per-report calls: {e}")
+            results.extend(single_fn(text) for text in batch)
+
+    return results
+
+@traceable(
+    run_type="llm",
+    name="therapy_extraction_batch",
+    tags=["therapy", "medical_report", "mistral", "batch"],
+    metadata={"model": "mistral-medium-latest", "report_type": "therapy"}
+)
+def get_therapy_json_batch(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> List[dict]:
+    """
+    Converts several therapy reports to structured JSON objects in batched calls.
     
-    schema = RadiationTherapyReport.model_json_schema()
+    Args:
+        texts: The markdown contents of the therapy reports.
+        batch_size: Maximum number of reports per chat call.
     
-    prompt = f"""Extract structured radiation therapy report data from this markdown text. Return only a JSON object conforming to this schema:
+    Returns:
+        A list of dictionaries with the structured therapy data, in input order.
+    """
+    return _get_json_batch(
+        texts, "therapy", _THERAPY_SCHEMA_JSON, _THERAPY_BATCH_RESPONSE_FORMAT, _THERAPY_NOTES,
+        get_therapy_json, batch_size
+    )
 
-{json.dumps(schema, indent=2)}
+@traceable(
+    run_type="llm",
+    name="radiation_extraction_batch",
+    tags=["radiation", "medical_report", "mistral", "batch"],
+    metadata={"model": "mistral-medium-latest", "report_type": "radiation"}
+)
+def get_radiation_json_batch(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> List[dict]:
+    """
+    Converts several radiation therapy reports to structured JSON objects in batched calls.
+    
+    Args:
+        texts: The markdown contents of the radiation therapy reports.
+        batch_size: Maximum number of reports per chat call.
+    
+    Returns:
+        A list of dictionaries with the structured radiation therapy data, in input order.
+    """
+    return _get_json_batch(
+        texts, "radiation therapy", _RADIATION_SCHEMA_JSON, _RADIATION_BATCH_RESPONSE_FORMAT, _RADIATION_NOTES,
+        get_radiation_json, batch_size
+    )
 
-Important notes:
-- radiation_type examples: 'EBRT' (External Beam Radiation Therapy), 'IMRT', 'IGRT', 'Stereotactic', 'Brachytherapy'
-- test_therapy should typically be 'therapy' for radiation therapy reports
-- Convert dates to YYYY-MM-DD format
-- Extract total dosage and unit (commonly 'Gy' for Gray)
-- area_treated should specify the anatomical region (e.g., 'Spine', 'Brain', 'Chest', 'Pelvis')
-- Include any adverse events or side effects mentioned
-- Extract number of fractions (treatment sessions)
+_BATCH_TERMINAL_STATUSES = {"SUCCESS", "FAILED", "TIMEOUT_EXCEEDED", "CANCELLED"}
 
-Report:
-{markdown_text}"""
+def submit_batch(
+    markdown_texts: List[str],
+    report_type: str,
+    custom_ids: Optional[List[str]] = None,
+    poll_interval: float = 10.0,
+    max_poll_interval: float = 300.0
+) -> List[dict]:
+    """
+    Converts reports to structured JSON through the Mistral Batch API.
+    
+    Batch jobs are billed at a discount and are not subject to the real-time
+    rate limits, at the cost of latency, so this suits overnight directory runs.
+    The job is polled with exponential backoff. Any report missing from the
+    output or failing to parse is re-run with a synchronous call.
+    
+    Args:
+        markdown_texts: The markdown contents of the reports.
+        report_type: "therapy" or "radiation".
+        custom_ids: Optional unique IDs per report (default: the report indices).
+        poll_interval: Initial seconds between job status checks.
+        max_poll_interval: Upper bound for the backoff between status checks.
+    
+    Returns:
+        A list of dictionaries with the structured data, in input order.
+    """
+    system_prompt, response_format, single_fn = {
+        "therapy": (_THERAPY_SYSTEM_PROMPT, _THERAPY_RESPONSE_FORMAT, get_therapy_json),
+        "radiation": (_RADIATION_SYSTEM_PROMPT, _RADIATION_RESPONSE_FORMAT, get_radiation_json),
+    }[report_type]
+    custom_ids = custom_ids or [str(i) for i in range(len(markdown_texts))]
+    if not markdown_texts:
+        return []
 
-    messages: List[Dict[str, str]] = [
-        {"role": "user", "content": prompt}
+    client = get_mistral_client()
+    model = "mistral-medium-latest"
+    batch_response_format = response_format.model_dump(mode="json", by_alias=True, exclude_none=True)
+    lines = [
+        orjson.dumps({
+            "custom_id": custom_id,
+            "body": {
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": f"Report:\n{text}"}
+                ],
+                "response_format": batch_response_format,
+                "max_tokens": EXTRACTION_MAX_TOKENS,
+                "temperature": 0.1
+            }
+        })
+        for custom_id, text in zip(custom_ids, markdown_texts)
     ]
 
     start_time = time.time()
+    contents: Dict[str, str] = {}
     try:
-        print(f"[🔄] Starting radiation therapy JSON extraction with {model}...")
-        
-        chat_response = client.chat.complete(
+        batch_file = client.files.upload(
+            file={"file_name": f"{report_type}_batch.jsonl", "content": b"\n".join(lines)},
+            purpose="batch"  # type: ignore
+        )
+        job = client.batch.jobs.create(
+            input_files=[batch_file.id],
             model=model,
-            messages=messages,  # type: ignore
-            response_format={"type": "json_object"},
-            max_tokens=4000,
-            temperature=0.1
+            endpoint="/v1/chat/completions"
         )
-        
-        response_content = chat_response.choices[0].message.content  # type: ignore
-        if response_content:
-            result = json.loads(response_content)  # type: ignore
-            elapsed_time = time.time() - start_time
-            print(f"[✅] Radiation therapy JSON extraction completed in {elapsed_time:.2f} seconds")
-            return result
+        print(f"[🔄] Submitted {report_type} batch job {job.id} with {len(lines)} reports...")
+
+        delay = poll_interval
+        while job.status not in _BATCH_TERMINAL_STATUSES:
+            time.sleep(delay)
+            delay = min(delay * 2, max_poll_interval)
+            job = client.batch.jobs.get(job_id=job.id)
+
+        elapsed_time = time.time() - start_time
+        if job.status != "SUCCESS":
+            logging.error(f"Batch job {job.id} finished with status {job.status} after {elapsed_time:.2f}s")
         else:
-            logging.error("Empty response from Mistral API")
-            return {}
+            print(f"[✅] Batch job {job.id} completed in {elapsed_time:.2f} seconds")
+
+        if job.output_file:
+            output = client.files.download(file_id=job.output_file)
+            for line in output.read().splitlines():
+                if not line.strip():
+                    continue
+                row = orjson.loads(line)
+                try:
+                    contents[row["custom_id"]] = row["response"]["body"]["choices"][0]["message"]["content"]
+                except (KeyError, IndexError, TypeError):
+                    logging.warning(f"No batch response content for {row.get('custom_id')}")
     except Exception as e:
-        elapsed_time = time.time() - start_time
-        logging.error(f"Failed to get radiation therapy data from Mistral API after {elapsed_time:.2f}s: {e}")
-        return {}
+        logging.error(f"Batch job for {report_type} reports failed: {e}")
+
+    results: List[dict] = []
+    for custom_id, text in zip(custom_ids, markdown_texts):
+        try:
+            results.append(orjson.loads(contents[custom_id]))
+        except Exception:
+            logging.warning(f"Batch result for {custom_id} missing or invalid, retrying synchronously")
+            results.append(single_fn(text))
+    return results
+
+def process_directory(
+    input_dir: str,
+    output_dir: str,
+    report_type: str,
+    batch_size: int,
+    use_batch_api: bool = False
+) -> None:
+    """
+    Converts every markdown report in a directory to JSON using batched calls.
+    
+    Args:
+        input_dir: Directory containing .md reports.
+        output_dir: Directory for the .json outputs (default: input_dir).
+        report_type: "therapy" or "radiation".
+        batch_size: Maximum number of reports per chat call.
+        use_batch_api: Submit one offline Batch API job instead of real-time calls.
+    """
+    paths = sorted(p for p in os.listdir(input_dir) if p.endswith(".md"))
+    if not paths:
+        logging.error(f"No markdown files found in {input_dir}")
+        return
+
+    texts = []
+    for name in paths:
+        with open(os.path.join(input_dir, name), 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+
+    if use_batch_api:
+        outputs = submit_batch(texts, report_type, custom_ids=paths)
+    else:
+        batch_fn = get_therapy_json_batch if report_type == "therapy" else get_radiation_json_batch
+        outputs = batch_fn(texts, batch_size=batch_size)
+
+    output_dir = output_dir or input_dir
+    os.makedirs(output_dir, exist_ok=True)
+    for name, json_output in zip(paths, outputs):
+        if not json_output:
+            logging.error(f"No JSON extracted for {name}")
+            continue
+        output_path = os.path.join(output_dir, f"{os.path.splitext(name)[0]}.json")
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(json_output, option=orjson.OPT_INDENT_2))
+        logging.info(f"Successfully created JSON output at {output_path}")
 
 def main():
     parser = argparse.ArgumentParser(description="Convert a medical report from markdown to JSON.")
-    parser.add_argument("input_file", type=str, help="Path to the input markdown file.")
-    parser.add_argument("--output_file", type=str, help="Optional path to the output JSON file.")
+    parser.add_argument("input_file", type=str, help="Path to the input markdown file, or a directory of markdown files.")
+    parser.add_argument("--output_file", type=str, help="Optional path to the output JSON file (output directory for directory input).")
     parser.add_argument("--report_type", type=str, default="therapy", 
                        choices=["therapy", "radiation"], 
                        help="Type of report to process (default: therapy)")
+    parser.add_argument("--batch_size", type=int, default=DEFAULT_BATCH_SIZE,
+                       help=f"Reports per LLM call for directory input (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--batch", action="store_true",
+                       help="For directory input, submit an offline Mistral Batch API job (cheaper, higher latency)")
     args = parser.parse_args()
 
+    if os.path.isdir(args.input_file):
+        process_directory(args.input_file, args.output_file, args.report_type, args.batch_size, use_batch_api=args.batch)
+        return
+
     try:
         with open(args.input_file, 'r', encoding='utf-8') as f:
             markdown_content = f.read()
@@ -186,11 +639,11 @@ def main():
 
     if json_output:
         if args.output_file:
-            with open(args.output_file, 'w', encoding='utf-8') as f:
-                json.dump(json_output, f, indent=4)
+            with open(args.output_file, 'wb') as f:
+                f.write(orjson.dumps(json_output, option=orjson.OPT_INDENT_2))
             logging.info(f"Successfully created JSON output at {args.output_file}")
         else:
-            print(json.dumps(json_output, indent=4))
+            print(orjson.dumps(json_output, option=orjson.OPT_INDENT_2).decode())
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
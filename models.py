@@ -1,5 +1,9 @@
 from typing import List, Optional, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+# Models without list fields are frozen: instances are immutable once validated,
+# and the flat ones are hashable for de-duplication across reports
+_FROZEN = ConfigDict(frozen=True)
 
 
 class TStageResult(BaseModel):
@@ -34,6 +38,7 @@ class TStageResult(BaseModel):
 
 class LymphNodeInvolvement(BaseModel):
     """Details of lymph node involvement."""
+    model_config = _FROZEN
     station: str = Field(..., description="IASLC station number (e.g., 4R, 7, 10L)")
     laterality: Literal["ipsilateral", "contralateral", "midline"] = Field(
         ..., 
@@ -64,6 +69,7 @@ class NStageResult(BaseModel):
 
 class MetastasisSite(BaseModel):
     """Details of metastatic site."""
+    model_config = _FROZEN
     organ_system: str = Field(
         ..., 
         description="Organ system involved (e.g., bone, liver, adrenal, brain, contralateral lung)"
@@ -95,6 +101,7 @@ class MStageResult(BaseModel):
 
 class TNMStaging(BaseModel):
     """Final TNM staging result combining all components."""
+    model_config = _FROZEN
     tnm_stage: str = Field(
         ..., 
         description="Combined TNM stage string (e.g., T2aN1M0)"
@@ -118,6 +125,7 @@ class TNMStaging(BaseModel):
 
 class ReportInput(BaseModel):
     """Input schema for radiology report."""
+    model_config = _FROZEN
     markdown_text: str = Field(..., description="Markdown text from PDF OCR conversion")
     report_id: Optional[str] = Field(None, description="Optional report identifier")
     patient_id: Optional[str] = Field(None, description="Optional patient identifier")
@@ -1,5 +1,8 @@
 import argparse
+import asyncio
 from pathlib import Path
+from typing import Optional
+import httpx
 from mistralai import Mistral
 from mistralai import DocumentURLChunk
 from mistralai.models import OCRResponse
@@ -7,150 +10,400 @@ import sys
 import os
 from dotenv import load_dotenv
 from tqdm import tqdm
+from tqdm.asyncio import tqdm_asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from filelock import FileLock, Timeout
 import re
 from markdown_it import MarkdownIt
 from mdit_plain.renderer import RendererPlain
+import threading
 import time
+import weakref
 import hashlib
-import json
+import io
+import importlib.util
 import logging
+import orjson
+import zstandard
 
 logger = logging.getLogger(__name__)
 
+# Hash of the PDF bytes used as the conversion cache key
+CACHE_HASH_ALGORITHM = "blake2b"
+# Bump when the cached OCR payload format changes so old entries are ignored
+OCR_CACHE_VERSION = 2
+# OCR cache locks are striped by hash prefix, bounding the lock files to 16**LOCK_STRIPE_CHARS
+LOCK_STRIPE_CHARS = 2
+# Seconds between non-blocking lock attempts on the async path
+LOCK_POLL_INTERVAL = 0.05
+
+# Pooled HTTP settings for Mistral clients; HTTP/2 needs the optional h2 package
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+HTTP_TIMEOUT = httpx.Timeout(300.0, connect=10.0)
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+# Markdown-to-plain-text cleanup, precompiled and applied in this order;
+# later patterns see the output of earlier ones, so the order is significant
+_MARKDOWN_CLEANUP = (
+    (re.compile(r'!\[.*?\]\(.*?\)'), ''),                     # Remove images
+    (re.compile(r'\[(.*?)\]\(.*?\)'), r'\1'),                 # Convert links to text
+    (re.compile(r'^#+\s+', re.MULTILINE), ''),                # Remove headers
+    (re.compile(r'^---\s*$', re.MULTILINE), ''),              # Remove horizontal rules
+    (re.compile(r'\*\*(.*?)\*\*'), r'\1'),                    # Remove bold
+    (re.compile(r'\*(.*?)\*'), r'\1'),                        # Remove italic
+    (re.compile(r'```.*?```', re.DOTALL), ''),                # Remove code blocks
+    (re.compile(r'`.*?`'), ''),                               # Remove inline code
+    (re.compile(r'^>\s+', re.MULTILINE), ''),                 # Remove blockquotes
+    (re.compile(r'^[\*\-]\s+', re.MULTILINE), ''),            # Remove list markers
+)
+_BLANK_LINES = re.compile(r'\n\s*\n')
+
+# OCR image reference whose target is its own id, e.g. ![img-0.jpeg](img-0.jpeg)
+_IMAGE_REF = re.compile(r'!\[([^\]]+)\]\(\1\)')
+
+
+def _strip_markdown(text: str) -> str:
+    """Apply the markdown cleanup patterns in order."""
+    for pattern, replacement in _MARKDOWN_CLEANUP:
+        text = pattern.sub(replacement, text)
+    return text
+
 class MarkdownConverter:
-    def __init__(self, api_key: str, cache_dir: str = ".pdf_cache"):
-        self.client = Mistral(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        cache_dir: str = ".pdf_cache",
+        http_client: Optional[httpx.Client] = None,
+        async_http_client: Optional[httpx.AsyncClient] = None
+    ):
+        # Reuse pooled HTTP clients so repeated conversions skip TCP/TLS setup;
+        # clients created here are owned (and closed) by the converter
+        self._owned_http_client = None
+        self._owned_async_http_client = None
+        if http_client is None:
+            http_client = self._owned_http_client = httpx.Client(
+                http2=HTTP2_ENABLED, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT
+            )
+        if async_http_client is None:
+            async_http_client = self._owned_async_http_client = httpx.AsyncClient(
+                http2=HTTP2_ENABLED, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT
+            )
+        self.client = Mistral(api_key=api_key, client=http_client, async_client=async_http_client)
         # Initialize the markdown parser with default renderer
         self.md_parser = MarkdownIt()
         # Set up cache directory
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        self.lock_dir = self.cache_dir / "locks"
+        self.lock_dir.mkdir(exist_ok=True)
+        self._async_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
     
-    def _get_file_hash(self, file_path: str) -> str:
-        """Generate SHA256 hash of file content for caching."""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+    def close(self):
+        """Close the sync HTTP client if this converter created it."""
+        if self._owned_http_client is not None:
+            self._owned_http_client.close()
+
+    async def aclose(self):
+        """Close the HTTP clients this converter created."""
+        self.close()
+        if self._owned_async_http_client is not None:
+            await self._owned_async_http_client.aclose()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
     
     def _get_cache_path(self, file_hash: str) -> Path:
-        """Get cache file path for a given file hash."""
-        return self.cache_dir / f"{file_hash}.json"
+        """Get cache file path for a given file hash and cache format version."""
+        return self.cache_dir / f"{file_hash}.v{OCR_CACHE_VERSION}.orjson.zst"
     
-    def _load_from_cache(self, file_hash: str) -> str:
-        """Load markdown text from cache if available."""
+    def _load_from_cache(self, file_hash: str, with_images: bool = False) -> Optional[OCRResponse]:
+        """Load the cached OCR response if available and able to render the requested variant."""
         cache_path = self._get_cache_path(file_hash)
         if cache_path.exists():
             try:
-                with open(cache_path, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                    logger.info(f"Loaded PDF conversion from cache: {file_hash[:8]}...")
-                    return cache_data['markdown_text']
+                cache_data = orjson.loads(zstandard.ZstdDecompressor().decompress(cache_path.read_bytes()))
+                if with_images and not cache_data['include_images']:
+                    return None
+                logger.info(f"Loaded PDF conversion from cache: {file_hash[:8]}...")
+                return OCRResponse.model_validate(cache_data['ocr_response'])
             except Exception as e:
                 logger.warning(f"Failed to load cache: {e}")
         return None
     
-    def _save_to_cache(self, file_hash: str, markdown_text: str):
-        """Save markdown text to cache."""
+    def _save_to_cache(self, file_hash: str, ocr_response: OCRResponse, include_images: bool = True):
+        """Save the OCR response to cache atomically, compressed with zstd.
+        
+        Both markdown variants are rendered from it on a cache hit; a response
+        fetched without base64 images only serves the images-off variant.
+        """
         cache_path = self._get_cache_path(file_hash)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump({'markdown_text': markdown_text}, f)
+            payload = orjson.dumps({
+                'include_images': include_images,
+                'ocr_response': ocr_response.model_dump(mode='json')
+            })
+            tmp_path.write_bytes(zstandard.ZstdCompressor(level=3).compress(payload))
+            os.replace(tmp_path, cache_path)
             logger.info(f"Saved PDF conversion to cache: {file_hash[:8]}...")
         except Exception as e:
             logger.warning(f"Failed to save cache: {e}")
 
     def replace_images_in_markdown(self, markdown_str, images_dict):
-        for img_name, base64_str in images_dict.items():
-            markdown_str = markdown_str.replace(
-                f"![{img_name}]({img_name})", f"![{img_name}]({base64_str})"
-            )
-        return markdown_str
+        """Embed base64 image data for OCR image references in one scan of the page."""
+        if not images_dict:
+            return markdown_str
+        return _IMAGE_REF.sub(
+            lambda m: f"![{m[1]}]({images_dict[m[1]]})" if m[1] in images_dict else m[0],
+            markdown_str
+        )
 
     def markdown_to_text(self, markdown_str):
         """Convert markdown to plain text using regex-based cleaning."""
         try:
             # Use regex-based cleaning for plain text conversion
-            text = re.sub(r'!\[.*?\]\(.*?\)', '', markdown_str)  # Remove images
-            text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)      # Convert links to text
-            text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)  # Remove headers
-            text = re.sub(r'^---\s*$', '', text, flags=re.MULTILINE)  # Remove horizontal rules
-            text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)        # Remove bold
-            text = re.sub(r'\*(.*?)\*', r'\1', text)            # Remove italic
-            text = re.sub(r'```.*?```', '', text, flags=re.DOTALL)  # Remove code blocks
-            text = re.sub(r'`.*?`', '', text)                   # Remove inline code
-            text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)  # Remove blockquotes
-            text = re.sub(r'^[\*\-]\s+', '', text, flags=re.MULTILINE)  # Remove list markers
-            text = re.sub(r'\n\s*\n', '\n\n', text)             # Normalize line breaks
+            text = _strip_markdown(markdown_str)
+            text = _BLANK_LINES.sub('\n\n', text)              # Normalize line breaks
             return text.strip()
         except Exception as e:
             print(f"Error processing text: {str(e)}")
             return markdown_str.strip()
 
     def get_combined_markdown(self, ocr_response: OCRResponse, embed_images=True):
-        markdowns = []
+        # Write pages straight into one buffer rather than joining a list of page strings
+        buf = io.StringIO()
         for page_num, page in enumerate(ocr_response.pages, 1):
-            markdowns.append(f"\n## Page {page_num}\n---\n")
-            image_data = {img.id: img.image_base64 for img in page.images}
+            if page_num > 1:
+                buf.write("\n")
+            buf.write(f"\n## Page {page_num}\n---\n\n")
             if embed_images:
-                page_content = self.replace_images_in_markdown(page.markdown, image_data)
+                image_data = {img.id: img.image_base64 for img in page.images}
+                buf.write(self.replace_images_in_markdown(page.markdown, image_data))
             else:
                 # Remove image markdown lines
-                lines = page.markdown.splitlines()
-                lines = [line for line in lines if not line.strip().startswith('![')]
-                page_content = '\n'.join(lines)
-            markdowns.append(page_content)
-            markdowns.append("\n")
-        return "\n".join(markdowns)
-
-    def convert_to_markdown(self, input_pdf_path: str, use_cache: bool = True):
+                buf.write('\n'.join(
+                    line for line in page.markdown.splitlines() if not line.strip().startswith('![')
+                ))
+            buf.write("\n\n")
+        return buf.getvalue()
+
+    def ocr_to_plain_text(self, ocr_response: OCRResponse) -> str:
+        """Render plain text from OCR pages.
+        
+        The cleanup runs once over the combined no-images markdown rather than
+        page by page, since markdown syntax (e.g. a code block) can span pages.
+        """
+        return self.markdown_to_text(self.get_combined_markdown(ocr_response, embed_images=False))
+
+    def _cache_lock(self, file_hash: str) -> FileLock:
+        """Inter-process lock serializing OCR and cache writes for a file hash's stripe."""
+        return FileLock(str(self.lock_dir / f"{file_hash[:LOCK_STRIPE_CHARS]}.lock"))
+
+    async def _acquire_file_lock(self, file_lock: FileLock):
+        """Poll for a file lock without blocking the event loop; a cancelled wait never holds it."""
+        while True:
+            try:
+                file_lock.acquire(timeout=0)
+                return
+            except Timeout:
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+
+    def _async_cache_lock(self, file_hash: str) -> asyncio.Lock:
+        """In-process lock so only one task per file hash waits on the file lock."""
+        lock = self._async_locks.get(file_hash)
+        if lock is None:
+            lock = self._async_locks[file_hash] = asyncio.Lock()
+        return lock
+
+    def _read_and_hash(self, pdf_file: Path):
+        """Read a PDF once, returning its bytes and their cache-key hash."""
+        data = pdf_file.read_bytes()
+        return data, hashlib.new(CACHE_HASH_ALGORITHM, data).hexdigest()
+
+    def _ocr(self, pdf_file: Path, need_images: bool, data: Optional[bytes] = None) -> OCRResponse:
+        """Upload a PDF (or its already-read bytes) and run Mistral OCR on it."""
+        uploaded_file = self.client.files.upload(
+            file={
+                "file_name": pdf_file.stem,
+                "content": data if data is not None else pdf_file.read_bytes(),
+            },
+            purpose="ocr",
+        )
+        signed_url = self.client.files.get_signed_url(file_id=uploaded_file.id, expiry=1)
+        return self.client.ocr.process(
+            document=DocumentURLChunk(document_url=signed_url.url),
+            model="mistral-ocr-latest",
+            include_image_base64=need_images
+        )
+
+    async def _ocr_async(self, pdf_file: Path, need_images: bool, data: Optional[bytes] = None) -> OCRResponse:
+        """Async variant of _ocr using the SDK's async client."""
+        uploaded_file = await self.client.files.upload_async(
+            file={
+                "file_name": pdf_file.stem,
+                "content": data if data is not None else await asyncio.to_thread(pdf_file.read_bytes),
+            },
+            purpose="ocr",
+        )
+        signed_url = await self.client.files.get_signed_url_async(file_id=uploaded_file.id, expiry=1)
+        return await self.client.ocr.process_async(
+            document=DocumentURLChunk(document_url=signed_url.url),
+            model="mistral-ocr-latest",
+            include_image_base64=need_images
+        )
+
+    def convert_to_markdown_variants(self, input_pdf_path: str, use_cache: bool = True):
+        """
+        Get (with_images, without_images) markdown from at most one OCR call.
+        
+        Args:
+            input_pdf_path: Path to PDF file
+            use_cache: Whether to use cache (default: True)
+            
+        Returns:
+            Tuple of (markdown with embedded images, markdown without images)
+        """
+        ocr_response = self.convert_to_markdown(input_pdf_path, use_cache=use_cache, with_images=True)
+        return (
+            self.get_combined_markdown(ocr_response, embed_images=True),
+            self.get_combined_markdown(ocr_response, embed_images=False)
+        )
+
+    async def convert_to_markdown_variants_async(self, input_pdf_path: str, use_cache: bool = True):
+        """Async variant of convert_to_markdown_variants."""
+        ocr_response = await self.convert_to_markdown_async(input_pdf_path, use_cache=use_cache, with_images=True)
+        return (
+            self.get_combined_markdown(ocr_response, embed_images=True),
+            self.get_combined_markdown(ocr_response, embed_images=False)
+        )
+
+    def convert_to_markdown(
+        self,
+        input_pdf_path: str,
+        use_cache: bool = True,
+        with_images: bool = False,
+        file_hash: Optional[str] = None,
+        need_images: Optional[bool] = None,
+        refresh_cache: bool = False
+    ):
         """
         Convert PDF to markdown with optional caching.
         
         Args:
             input_pdf_path: Path to PDF file
             use_cache: Whether to use cache (default: True)
+            with_images: Whether the caller renders images (a cached response must include them)
+            file_hash: Precomputed CACHE_HASH_ALGORITHM hash of the PDF (e.g., hashed during upload)
+            need_images: Fetch base64 images from OCR (default: with_images); skipping
+                them shrinks the response when only the images-off variant is used
+            refresh_cache: Skip the cache read but store the fresh OCR result
             
         Returns:
-            OCRResponse object or cached response dict
+            OCRResponse, freshly fetched or loaded from cache
         """
+        if need_images is None:
+            need_images = with_images
         pdf_file = Path(input_pdf_path)
         if not pdf_file.is_file():
             raise FileNotFoundError(f"Input PDF file not found: {input_pdf_path}")
         
-        # Check cache first
-        if use_cache:
-            file_hash = self._get_file_hash(input_pdf_path)
-            cached_text = self._load_from_cache(file_hash)
-            if cached_text:
-                # Return a dict indicating cached response
-                return {"cached": True, "markdown_text": cached_text}
+        if not use_cache:
+            return self._ocr(pdf_file, need_images)
         
-        # OCR - use the existing client instance
-        uploaded_file = self.client.files.upload(
-            file={
-                "file_name": pdf_file.stem,
-                "content": pdf_file.read_bytes(),
-            },
-            purpose="ocr",
-        )
-        signed_url = self.client.files.get_signed_url(file_id=uploaded_file.id, expiry=1)
-        pdf_response = self.client.ocr.process(
-            document=DocumentURLChunk(document_url=signed_url.url),
-            model="mistral-ocr-latest",
-            include_image_base64=True
-        )
+        # Check cache first; the bytes read for hashing are reused for the upload
+        data = None
+        if not file_hash:
+            data, file_hash = self._read_and_hash(pdf_file)
+        if not refresh_cache:
+            cached_response = self._load_from_cache(file_hash, with_images)
+            if cached_response is not None:
+                return cached_response
+        
+        # One OCR per file across threads and processes; re-check once the lock is held
+        with self._cache_lock(file_hash):
+            if not refresh_cache:
+                cached_response = self._load_from_cache(file_hash, with_images)
+                if cached_response is not None:
+                    return cached_response
+            pdf_response = self._ocr(pdf_file, need_images, data)
+            self._save_to_cache(file_hash, pdf_response, need_images)
+        
+        return pdf_response
+
+    async def convert_to_markdown_async(
+        self,
+        input_pdf_path: str,
+        use_cache: bool = True,
+        with_images: bool = False,
+        file_hash: Optional[str] = None,
+        need_images: Optional[bool] = None,
+        refresh_cache: bool = False
+    ):
+        """
+        Async variant of convert_to_markdown using the SDK's async client.
+        
+        Args:
+            input_pdf_path: Path to PDF file
+            use_cache: Whether to use cache (default: True)
+            with_images: Whether the caller renders images (a cached response must include them)
+            file_hash: Precomputed CACHE_HASH_ALGORITHM hash of the PDF (e.g., hashed during upload)
+            need_images: Fetch base64 images from OCR (default: with_images); skipping
+                them shrinks the response when only the images-off variant is used
+            refresh_cache: Skip the cache read but store the fresh OCR result
+            
+        Returns:
+            OCRResponse, freshly fetched or loaded from cache
+        """
+        if need_images is None:
+            need_images = with_images
+        pdf_file = Path(input_pdf_path)
+        if not pdf_file.is_file():
+            raise FileNotFoundError(f"Input PDF file not found: {input_pdf_path}")
+        
+        if not use_cache:
+            return await self._ocr_async(pdf_file, need_images)
         
-        # Save to cache
-        if use_cache:
-            file_hash = self._get_file_hash(input_pdf_path)
-            markdown_text = self.get_combined_markdown(pdf_response, embed_images=False)
-            self._save_to_cache(file_hash, markdown_text)
+        # Check cache first; hashing, cache I/O and lock waits run in worker threads to keep the event loop free
+        data = None
+        if not file_hash:
+            data, file_hash = await asyncio.to_thread(self._read_and_hash, pdf_file)
+        if not refresh_cache:
+            cached_response = await asyncio.to_thread(self._load_from_cache, file_hash, with_images)
+            if cached_response is not None:
+                return cached_response
+        
+        async with self._async_cache_lock(file_hash):
+            file_lock = self._cache_lock(file_hash)
+            await self._acquire_file_lock(file_lock)
+            try:
+                if not refresh_cache:
+                    cached_response = await asyncio.to_thread(self._load_from_cache, file_hash, with_images)
+                    if cached_response is not None:
+                        return cached_response
+                pdf_response = await self._ocr_async(pdf_file, need_images, data)
+                await asyncio.to_thread(self._save_to_cache, file_hash, pdf_response, need_images)
+            finally:
+                file_lock.release()
         
         return pdf_response
 
-def pdf_to_markdown_text(pdf_path: str, converter: MarkdownConverter, with_images=False, use_cache=True) -> str:
+def pdf_to_markdown_text(
+    pdf_path: str,
+    converter: MarkdownConverter,
+    with_images=False,
+    use_cache=True,
+    file_hash: Optional[str] = None,
+    refresh_cache: bool = False
+) -> str:
     """
     Process a single PDF file and return the markdown text.
     
@@ -159,57 +412,177 @@ def pdf_to_markdown_text(pdf_path: str, converter: MarkdownConverter, with_image
         converter: MarkdownConverter instance
         with_images: Whether to include images in markdown
         use_cache: Whether to use cached conversion (default: True)
+        file_hash: Precomputed CACHE_HASH_ALGORITHM hash of the PDF, if already known
+        refresh_cache: Skip the cache read but store the fresh conversion
         
     Returns:
         Markdown text string
     """
     try:
-        ocr_response = converter.convert_to_markdown(pdf_path, use_cache=use_cache)
-        
-        # Handle cached response
-        if isinstance(ocr_response, dict) and ocr_response.get("cached"):
-            logger.info(f"Using cached PDF conversion for {Path(pdf_path).name}")
-            return ocr_response["markdown_text"]
+        ocr_response = converter.convert_to_markdown(
+            pdf_path, use_cache=use_cache, with_images=with_images, file_hash=file_hash,
+            refresh_cache=refresh_cache
+        )
         
-        # Process normal OCR response
         markdown_text = converter.get_combined_markdown(ocr_response, embed_images=with_images)
         return markdown_text
     except Exception as e:
         logger.error(f"Error processing {pdf_path}: {str(e)}")
         raise
 
-def process_pdf(pdf_path: Path, converter: MarkdownConverter):
-    """Process a single PDF file and generate markdown and text outputs."""
+async def pdf_to_markdown_text_async(
+    pdf_path: str,
+    converter: MarkdownConverter,
+    with_images=False,
+    use_cache=True,
+    file_hash: Optional[str] = None,
+    refresh_cache: bool = False
+) -> str:
+    """
+    Async variant of pdf_to_markdown_text for use inside an event loop.
+    
+    Args:
+        pdf_path: Path to PDF file
+        converter: MarkdownConverter instance
+        with_images: Whether to include images in markdown
+        use_cache: Whether to use cached conversion (default: True)
+        file_hash: Precomputed CACHE_HASH_ALGORITHM hash of the PDF, if already known
+        refresh_cache: Skip the cache read but store the fresh conversion
+        
+    Returns:
+        Markdown text string
+    """
     try:
-        out_base = pdf_path.with_suffix('')
-        out_md_with_images = f"{out_base}_with_images.md"
-        out_md_no_images = f"{out_base}_no_images.md"
-        out_txt = f"{out_base}.txt"
+        ocr_response = await converter.convert_to_markdown_async(
+            pdf_path, use_cache=use_cache, with_images=with_images, file_hash=file_hash,
+            refresh_cache=refresh_cache
+        )
         
-        markdown_with_images = pdf_to_markdown_text(str(pdf_path), converter, with_images=True)
-        markdown_no_images = pdf_to_markdown_text(str(pdf_path), converter, with_images=False)
+        return converter.get_combined_markdown(ocr_response, embed_images=with_images)
+    except Exception as e:
+        logger.error(f"Error processing {pdf_path}: {str(e)}")
+        raise
 
-        # With images
-        with open(out_md_with_images, 'w', encoding='utf-8') as f:
-            f.write(markdown_with_images)
-        
-        # Without images
-        with open(out_md_no_images, 'w', encoding='utf-8') as f:
-            f.write(markdown_no_images)
-        
-        # Plain text version
-        plain_text = converter.markdown_to_text(markdown_no_images)
-        with open(out_txt, 'w', encoding='utf-8') as f:
-            f.write(plain_text)
-            
+def _write_outputs(pdf_path: Path, converter: MarkdownConverter, ocr_response: OCRResponse):
+    """Render and write the markdown and plain text outputs next to the PDF."""
+    out_base = pdf_path.with_suffix('')
+    with open(f"{out_base}_with_images.md", 'w', encoding='utf-8') as f:
+        f.write(converter.get_combined_markdown(ocr_response, embed_images=True))
+    markdown_no_images = converter.get_combined_markdown(ocr_response, embed_images=False)
+    with open(f"{out_base}_no_images.md", 'w', encoding='utf-8') as f:
+        f.write(markdown_no_images)
+    with open(f"{out_base}.txt", 'w', encoding='utf-8') as f:
+        f.write(converter.markdown_to_text(markdown_no_images))
+
+def process_pdf(pdf_path: Path, converter: MarkdownConverter):
+    """Process a single PDF file and generate markdown and text outputs."""
+    try:
+        ocr_response = converter.convert_to_markdown(str(pdf_path), with_images=True)
+        _write_outputs(pdf_path, converter, ocr_response)
         return True, f"Successfully processed {pdf_path.name}"
     except Exception as e:
         return False, f"Error processing {pdf_path.name}: {str(e)}"
 
+class AsyncRateLimiter:
+    """Space out request starts to at most `rate` per second across tasks."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+async def process_pdf_async(
+    pdf_path: Path,
+    converter: MarkdownConverter,
+    semaphore: asyncio.Semaphore,
+    limiter: AsyncRateLimiter
+):
+    """Async variant of process_pdf, bounded by a semaphore and rate limiter."""
+    async with semaphore:
+        try:
+            await limiter.acquire()
+            ocr_response = await converter.convert_to_markdown_async(str(pdf_path), with_images=True)
+            await asyncio.to_thread(_write_outputs, pdf_path, converter, ocr_response)
+            return True, f"Successfully processed {pdf_path.name}"
+        except Exception as e:
+            return False, f"Error processing {pdf_path.name}: {str(e)}"
+
+async def process_directory_async(pdf_files, converter: MarkdownConverter, concurrency: int, rate: float):
+    """Convert PDFs concurrently; returns (success_count, error_count)."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    limiter = AsyncRateLimiter(rate)
+    tasks = [process_pdf_async(pdf_file, converter, semaphore, limiter) for pdf_file in pdf_files]
+    success_count = 0
+    error_count = 0
+    for future in tqdm_asyncio.as_completed(tasks, total=len(tasks), desc="Processing PDFs"):
+        success, message = await future
+        if success:
+            success_count += 1
+        else:
+            error_count += 1
+            print(f"\n{message}")
+    return success_count, error_count
+
+class RateLimiter:
+    """Thread-safe variant of AsyncRateLimiter for the thread-pool fallback."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+def process_directory_threaded(pdf_files, converter: MarkdownConverter, concurrency: int, rate: float):
+    """Convert PDFs on a thread pool for SDKs without async OCR; returns (success_count, error_count).
+    
+    Socket I/O releases the GIL, so up to `concurrency` OCR jobs overlap; the
+    converter only shares the thread-safe Mistral client between threads.
+    """
+    limiter = RateLimiter(rate)
+
+    def run(pdf_file: Path):
+        limiter.acquire()
+        return process_pdf(pdf_file, converter)
+
+    success_count = 0
+    error_count = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [executor.submit(run, pdf_file) for pdf_file in pdf_files]
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Processing PDFs"):
+            success, message = future.result()
+            if success:
+                success_count += 1
+            else:
+                error_count += 1
+                print(f"\n{message}")
+    return success_count, error_count
+
+async def _run_directory(pdf_files, converter, concurrency, rate):
+    """Process a directory and close the converter's async client on its loop."""
+    async with converter:
+        return await process_directory_async(pdf_files, converter, concurrency, rate)
+
 def main():
     load_dotenv()
     parser = argparse.ArgumentParser(description="Convert PDF(s) to Markdown and plain text using Mistral OCR.")
     parser.add_argument('--input_pdf', required=True, help='Path to the input PDF file or directory containing PDF files')
+    parser.add_argument('--concurrency', type=int, default=8, help='Maximum PDFs converted at once (default: 8)')
+    parser.add_argument('--rate', type=float, default=2.0, help='Maximum new OCR requests per second (default: 2)')
     args = parser.parse_args()
     
     input_path = Path(args.input_pdf)
@@ -219,40 +592,34 @@ def main():
         sys.exit(1)
     
     # Create converter with shared client instance
-    converter = MarkdownConverter(api_key=api_key)
-    
-    if input_path.is_file() and input_path.suffix.lower() == '.pdf':
-        # Process single PDF
-        success, message = process_pdf(input_path, converter)
-        print(message)
-    elif input_path.is_dir():
-        # Process all PDFs in directory
-        pdf_files = list(input_path.glob('*.pdf'))
-        if not pdf_files:
-            print(f"No PDF files found in {input_path}")
-            sys.exit(1)
-            
-        print(f"Found {len(pdf_files)} PDF files to process")
-        success_count = 0
-        error_count = 0
-        
-        for pdf_file in tqdm(pdf_files, desc="Processing PDFs"):
-            success, message = process_pdf(pdf_file, converter)
-            if success:
-                success_count += 1
+    with MarkdownConverter(api_key=api_key) as converter:
+        if input_path.is_file() and input_path.suffix.lower() == '.pdf':
+            # Process single PDF
+            success, message = process_pdf(input_path, converter)
+            print(message)
+        elif input_path.is_dir():
+            # Process all PDFs in directory
+            pdf_files = list(input_path.glob('*.pdf'))
+            if not pdf_files:
+                print(f"No PDF files found in {input_path}")
+                sys.exit(1)
+                
+            print(f"Found {len(pdf_files)} PDF files to process")
+            if hasattr(converter.client.ocr, "process_async"):
+                success_count, error_count = asyncio.run(
+                    _run_directory(pdf_files, converter, args.concurrency, args.rate)
+                )
             else:
-                error_count += 1
-                print(f"\n{message}")
+                success_count, error_count = process_directory_threaded(
+                    pdf_files, converter, args.concurrency, args.rate
+                )
             
-            # Add delay between processing files to avoid socket exhaustion
-            time.sleep(1)
-        
-        print(f"\nProcessing complete:")
-        print(f"Successfully processed: {success_count} files")
-        print(f"Failed to process: {error_count} files")
-    else:
-        print(f"Error: {input_path} is not a valid PDF file or directory")
-        sys.exit(1)
+            print(f"\nProcessing complete:")
+            print(f"Successfully processed: {success_count} files")
+            print(f"Failed to process: {error_count} files")
+        else:
+            print(f"Error: {input_path} is not a valid PDF file or directory")
+            sys.exit(1)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -5,7 +5,9 @@ Rewritten to use standard Streamlit components and save data locally.
 
 import streamlit as st
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+import orjson
 import os
 import shutil
 from datetime import datetime
@@ -17,11 +19,26 @@ DATA_DIR = "data"
 UPLOADS_DIR = os.path.join(DATA_DIR, "uploads")
 RESULTS_DIR = os.path.join(DATA_DIR, "results")
 
+st.set_page_config(page_title="TNM Staging Analyzer", layout="wide")
+
+@st.cache_resource(show_spinner=False)
+def _ensure_dirs() -> None:
+    """Create the upload and result directories once per server process."""
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+
 # Ensure directories exist
-os.makedirs(UPLOADS_DIR, exist_ok=True)
-os.makedirs(RESULTS_DIR, exist_ok=True)
+_ensure_dirs()
 
-st.set_page_config(page_title="TNM Staging Analyzer", layout="wide")
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Return a pooled HTTP session shared across Streamlit reruns."""
+    # Cached as a resource because Streamlit re-executes this script on every interaction
+    session = requests.Session()
+    # No automatic retries: the streamed PDF upload cannot be replayed, and urllib3 skips POST retries anyway
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount(API_BASE_URL, adapter)
+    return session
 
 def save_uploaded_file(uploaded_file) -> str:
     """Save uploaded file to disk and return the path."""
@@ -29,42 +46,52 @@ def save_uploaded_file(uploaded_file) -> str:
     filename = f"{timestamp}_{uploaded_file.name}"
     file_path = os.path.join(UPLOADS_DIR, filename)
     
+    # Copy in 1 MiB chunks so peak memory stays at the chunk size
+    uploaded_file.seek(0)
     with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+        shutil.copyfileobj(uploaded_file, f, length=1024 * 1024)
     
     return file_path
 
 def save_result(original_filename: str, api_result: Dict, feedback: Dict):
     """Save the analysis result and user feedback to a JSON file."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
     filename = f"{timestamp}_{original_filename}.json"
     file_path = os.path.join(RESULTS_DIR, filename)
     
     data = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now.isoformat(),
         "original_filename": original_filename,
         "api_result": api_result,
         "user_feedback": feedback
     }
     
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=2)
+    # OPT_SERIALIZE_NUMPY keeps any numpy scalars serializable
+    with open(file_path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     return file_path
 
+def _post_pdf(filename: str, fileobj) -> requests.Response:
+    """POST a PDF to the staging API as a streamed multipart body."""
+    # MultipartEncoder reads the file as the socket sends, instead of building the body in memory
+    encoder = MultipartEncoder(fields={"file": (filename, fileobj, "application/pdf")})
+    return get_session().post(
+        f"{API_BASE_URL}/api/v1/stage/pdf",
+        data=encoder,
+        headers={"Content-Type": encoder.content_type},
+        timeout=120
+    )
+
 def stage_from_pdf(file_path: str) -> Optional[Dict[str, Any]]:
     """Send PDF file path to API for staging."""
     try:
         with open(file_path, "rb") as f:
-            files = {"file": (os.path.basename(file_path), f, "application/pdf")}
-            response = requests.post(
-                f"{API_BASE_URL}/api/v1/stage/pdf",
-                files=files,
-                timeout=120
-            )
+            response = _post_pdf(os.path.basename(file_path), f)
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         st.error(f"API Error: {str(e)}")
         return None
 
@@ -73,20 +100,13 @@ def stage_from_pdf_direct(uploaded_file) -> Optional[Dict[str, Any]]:
     try:
         # Reset file pointer to beginning
         uploaded_file.seek(0)
-        files = {"file": (uploaded_file.name, uploaded_file, "application/pdf")}
-        response = requests.post(
-            f"{API_BASE_URL}/api/v1/stage/pdf",
-            files=files,
-            timeout=120
-        )
+        response = _post_pdf(uploaded_file.name, uploaded_file)
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         st.error(f"API Error: {str(e)}")
         return None
 
-import pandas as pd
-
 def render_deep_dive(staging: Dict[str, Any]):
     """Render detailed staging information in a user-friendly format."""
     st.markdown("---")
@@ -95,15 +115,15 @@ def render_deep_dive(staging: Dict[str, Any]):
 
     # Tumor (T)
     st.markdown("### Tumor (T-Stage)")
-    tumor = staging.get("tumor", {})
+    tumor = staging.get("tumor") or {}
     
     # Create a cleaner layout for Tumor details using a dictionary for display
     tumor_data = {
         "Stage": tumor.get('stage', 'N/A'),
         "Size": f"{tumor.get('tumor_size_mm', 'N/A')} mm",
         "Location": tumor.get('location', 'N/A'),
-        "Invasion": ', '.join(tumor.get('invasion', [])) or 'None',
-        "Nodules": ', '.join(tumor.get('separate_nodules', [])) or 'None'
+        "Invasion": ', '.join(tumor.get('invasion') or []) or 'None',
+        "Nodules": ', '.join(tumor.get('separate_nodules') or []) or 'None'
     }
     
     # Display as key-value pairs in columns
@@ -120,18 +140,15 @@ def render_deep_dive(staging: Dict[str, Any]):
 
     # Nodes (N)
     st.markdown("### Lymph Nodes (N-Stage)")
-    nodes = staging.get("nodes", {})
+    nodes = staging.get("nodes") or {}
     st.write(f"**Stage:** {nodes.get('stage', 'N/A')}")
     
-    involved = nodes.get("involved_nodes", [])
+    involved = nodes.get("involved_nodes") or []
     if involved:
         st.write("**Involved Nodes:**")
-        # Convert to DataFrame for table display
-        df_nodes = pd.DataFrame(involved)
-        # Select and rename columns if they exist
-        cols_to_show = ['station', 'laterality', 'description']
-        df_nodes = df_nodes[[c for c in cols_to_show if c in df_nodes.columns]]
-        st.table(df_nodes)
+        # st.table takes a list of dicts directly; keep the columns present in any row
+        cols_to_show = [c for c in ['station', 'laterality', 'description'] if any(c in row for row in involved)]
+        st.table([{c: row.get(c, "") for c in cols_to_show} for row in involved])
     else:
         st.write("No involved nodes detected.")
 
@@ -142,18 +159,15 @@ def render_deep_dive(staging: Dict[str, Any]):
 
     # Metastasis (M)
     st.markdown("### Metastasis (M-Stage)")
-    metastasis = staging.get("metastasis", {})
+    metastasis = staging.get("metastasis") or {}
     st.write(f"**Stage:** {metastasis.get('stage', 'N/A')}")
     
-    sites = metastasis.get("metastasis_sites", [])
+    sites = metastasis.get("metastasis_sites") or []
     if sites:
         st.write("**Metastatic Sites:**")
-        # Convert to DataFrame for table display
-        df_sites = pd.DataFrame(sites)
-        # Select and rename columns if they exist
-        cols_to_show = ['organ_system', 'location', 'description']
-        df_sites = df_sites[[c for c in cols_to_show if c in df_sites.columns]]
-        st.table(df_sites)
+        # st.table takes a list of dicts directly; keep the columns present in any row
+        cols_to_show = [c for c in ['organ_system', 'location', 'description'] if any(c in row for row in sites)]
+        st.table([{c: row.get(c, "") for c in cols_to_show} for row in sites])
     else:
         st.write("No distant metastasis detected.")
 
@@ -196,16 +210,19 @@ def main():
     # Display Results if available
     if "current_result" in st.session_state:
         result = st.session_state.current_result
-        staging = result.get("staging", {})
+        staging = result.get("staging") or {}
 
         st.divider()
         st.header("Staging Results")
 
         # Metrics
         col1, col2, col3, col4 = st.columns(4)
-        col1.metric("T-Stage", staging.get("tumor", {}).get("stage", "N/A"))
-        col2.metric("N-Stage", staging.get("nodes", {}).get("stage", "N/A"))
-        col3.metric("M-Stage", staging.get("metastasis", {}).get("stage", "N/A"))
+        tumor = staging.get("tumor") or {}
+        nodes = staging.get("nodes") or {}
+        metastasis = staging.get("metastasis") or {}
+        col1.metric("T-Stage", tumor.get("stage", "N/A"))
+        col2.metric("N-Stage", nodes.get("stage", "N/A"))
+        col3.metric("M-Stage", metastasis.get("stage", "N/A"))
         col4.metric("Overall Stage", staging.get("overall_stage", "N/A"))
 
         # Summary
@@ -4,6 +4,7 @@ This tests the agents without requiring a full PDF.
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from agents import TAgent, NAgent, MAgent, StagingCompiler
 
 # Configure logging
@@ -64,28 +65,33 @@ def test_agents():
         print(f"✗ T-Agent Failed: {e}")
         return False
     
-    # Test N-Agent
-    print("\n[2/4] Testing N-Agent...")
-    try:
+    # N-Agent needs T-Agent laterality; M-Agent is independent, so they run concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
         n_agent = NAgent()
-        context = {"tumor_laterality": t_result.get("laterality")}
-        n_result = n_agent.analyze(SAMPLE_REPORT, context=context)
-        print(f"✓ N-Agent Success: Stage = {n_result['stage']}")
-        print(f"  - Involved nodes: {len(n_result.get('involved_nodes', []))}")
-    except Exception as e:
-        print(f"✗ N-Agent Failed: {e}")
-        return False
-    
-    # Test M-Agent
-    print("\n[3/4] Testing M-Agent...")
-    try:
         m_agent = MAgent()
-        m_result = m_agent.analyze(SAMPLE_REPORT)
-        print(f"✓ M-Agent Success: Stage = {m_result['stage']}")
-        print(f"  - Metastasis sites: {len(m_result.get('metastasis_sites', []))}")
-    except Exception as e:
-        print(f"✗ M-Agent Failed: {e}")
-        return False
+        context = {"tumor_laterality": t_result.get("laterality")}
+        n_future = executor.submit(n_agent.analyze, SAMPLE_REPORT, context=context)
+        m_future = executor.submit(m_agent.analyze, SAMPLE_REPORT)
+        
+        # Test N-Agent
+        print("\n[2/4] Testing N-Agent...")
+        try:
+            n_result = n_future.result()
+            print(f"✓ N-Agent Success: Stage = {n_result['stage']}")
+            print(f"  - Involved nodes: {len(n_result.get('involved_nodes', []))}")
+        except Exception as e:
+            print(f"✗ N-Agent Failed: {e}")
+            return False
+        
+        # Test M-Agent
+        print("\n[3/4] Testing M-Agent...")
+        try:
+            m_result = m_future.result()
+            print(f"✓ M-Agent Success: Stage = {m_result['stage']}")
+            print(f"  - Metastasis sites: {len(m_result.get('metastasis_sites', []))}")
+        except Exception as e:
+            print(f"✗ M-Agent Failed: {e}")
+            return False
     
     # Test Staging Compiler
     print("\n[4/4] Testing Staging Compiler...")
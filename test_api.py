@@ -3,6 +3,7 @@ Test script for FastAPI endpoints
 """
 
 import requests
+from requests_toolbelt.multipart.encoder import MultipartEncoder
 import json
 from pathlib import Path
 
@@ -27,12 +28,16 @@ def test_pdf_upload():
         print(f"Error: Test PDF not found at {pdf_path}\n")
         return False
     
+    # MultipartEncoder streams the PDF from disk instead of buffering the whole body
     with open(pdf_path, 'rb') as f:
-        files = {'file': ('test_pet_ct8.pdf', f, 'application/pdf')}
+        encoder = MultipartEncoder(fields={
+            'report_id': 'TEST001',
+            'file': ('test_pet_ct8.pdf', f, 'application/pdf')
+        })
         response = requests.post(
             f"{BASE_URL}/api/v1/stage/pdf",
-            files=files,
-            data={'report_id': 'TEST001'}
+            data=encoder,
+            headers={'Content-Type': encoder.content_type}
         )
     
     print(f"Status: {response.status_code}")
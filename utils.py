@@ -27,17 +27,28 @@ def normalize_evidence_field(data: Dict[str, Any], field_name: str = "evidence")
         value = data[field_name]
         if isinstance(value, list):
             # Join list items with newlines and spaces
-            normalized = " ".join(str(item) for item in value if item)
-            logger.warning(f"Normalized {field_name} from list to string: {len(value)} items")
+            normalized = " ".join(map(str, filter(None, value)))
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Normalized %s from list to string: %d items", field_name, len(value))
             data[field_name] = normalized
         elif value is None:
             # Set empty string if None
             data[field_name] = ""
-            logger.warning(f"Normalized {field_name} from None to empty string")
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("Normalized %s from None to empty string", field_name)
     
     return data
 
 
+_NESTED_RESULT_KEYS = ("tumor", "nodes", "metastasis")
+
+
+def _evidence_needs_normalizing(data: Dict[str, Any]) -> bool:
+    """Check whether normalize_evidence_field would change a dict's evidence."""
+    value = data.get("evidence", "")
+    return value is None or isinstance(value, list)
+
+
 def normalize_agent_response(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Normalize agent response to fix common LLM output issues.
@@ -46,12 +57,22 @@ def normalize_agent_response(data: Dict[str, Any]) -> Dict[str, Any]:
     - Evidence fields returned as lists instead of strings
     - None values in required string fields
     
+    The dictionary is normalized in place; pass a copy if the raw
+    response must be preserved.
+    
     Args:
         data: Raw agent response dictionary
         
     Returns:
-        Normalized dictionary ready for Pydantic validation
+        The same dictionary, normalized and ready for Pydantic validation
     """
+    # Well-formed responses (the common case) need no changes
+    if not _evidence_needs_normalizing(data) and not any(
+        isinstance(data.get(key), dict) and _evidence_needs_normalizing(data[key])
+        for key in _NESTED_RESULT_KEYS
+    ):
+        return data
+    
     # Normalize evidence field
     data = normalize_evidence_field(data, "evidence")
     
@@ -93,13 +114,14 @@ def validate_with_retry(
     
     last_error = None
     
+    # Normalization is idempotent and may mutate, so copy once rather than per
+    # attempt; model_validate itself never mutates its input
+    normalized_data = normalize_fn(dict(data)) if normalize_fn else data
+    
     for attempt in range(max_retries):
         try:
-            # Apply normalization if provided
-            normalized_data = normalize_fn(data.copy()) if normalize_fn else data.copy()
-            
             # Attempt validation
-            return model_class(**normalized_data)
+            return model_class.model_validate(normalized_data)
             
         except ValidationError as e:
             last_error = e
@@ -5,24 +5,35 @@ This module orchestrates the multi-agent workflow for TNM staging prediction.
 Uses LangGraph for state management and agent coordination.
 """
 
-from typing import TypedDict, Dict, Any, Optional
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
+import asyncio
 import logging
-from agents import TAgent, NAgent, MAgent, StagingCompiler
+import random
+import threading
+from agents import TAgent, NAgent, MAgent, StagingCompiler, CombinedAgent, aclose_loop_client
+from config import get_settings
 
 logger = logging.getLogger(__name__)
 
 
-class TNMWorkflowState(TypedDict):
-    """State for the TNM staging workflow."""
+@dataclass(slots=True)
+class TNMWorkflowState:
+    """State for the TNM staging workflow.
+    
+    Nodes receive an instance and return it after setting attributes;
+    graph.ainvoke still returns the final state as a dict.
+    """
     report_text: str
-    report_id: Optional[str]
-    patient_id: Optional[str]
-    t_result: Optional[Dict[str, Any]]
-    n_result: Optional[Dict[str, Any]]
-    m_result: Optional[Dict[str, Any]]
-    final_staging: Optional[Dict[str, Any]]
-    error: Optional[str]
+    report_id: Optional[str] = None
+    patient_id: Optional[str] = None
+    t_result: Optional[Dict[str, Any]] = None
+    n_result: Optional[Dict[str, Any]] = None
+    m_result: Optional[Dict[str, Any]] = None
+    final_staging: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
 
 
 class TNMWorkflow:
@@ -34,34 +45,31 @@ class TNMWorkflow:
         self.n_agent = NAgent()
         self.m_agent = MAgent()
         self.compiler = StagingCompiler()
-        self.graph = self._build_graph()
+        self.combined_agent = CombinedAgent() if get_settings().combined_agent_enabled else None
+        self.graph = _COMPILED_GRAPH
     
-    def _t_agent_node(self, state: TNMWorkflowState) -> TNMWorkflowState:
+    async def _t_agent_node(self, state: TNMWorkflowState) -> TNMWorkflowState:
         """Execute T-Agent analysis with retry logic."""
-        import time
-        
         max_retries = 3
         retry_delay = 1.0
         
         for attempt in range(max_retries):
             try:
                 logger.info(f"Workflow: Executing T-Agent (attempt {attempt + 1}/{max_retries})")
-                t_result = self.t_agent.analyze(state["report_text"])
-                state["t_result"] = t_result
+                t_result = await self.t_agent.analyze_async(state.report_text)
+                state.t_result = t_result
                 return state
             except Exception as e:
                 if attempt < max_retries - 1:
                     logger.warning(f"Workflow: T-Agent attempt {attempt + 1} failed, retrying... Error: {str(e)[:200]}")
-                    time.sleep(retry_delay * (2 ** attempt))  # Exponential backoff
+                    await asyncio.sleep(random.uniform(0, retry_delay * (2 ** attempt)))  # Exponential backoff, full jitter
                 else:
                     logger.error(f"Workflow: T-Agent failed after {max_retries} attempts: {e}")
-                    state["error"] = f"T-Agent error: {str(e)}"
+                    state.error = f"T-Agent error: {str(e)}"
                     return state
     
-    def _n_agent_node(self, state: TNMWorkflowState) -> TNMWorkflowState:
+    async def _n_agent_node(self, state: TNMWorkflowState) -> TNMWorkflowState:
         """Execute N-Agent analysis with tumor laterality context and retry logic."""
-        import time
-        
         max_retries = 3
         retry_delay = 1.0
         
@@ -71,117 +79,133 @@ class TNMWorkflow:
                 
                 # Extract laterality from T-result if available
                 context = {}
-                if state.get("t_result"):
-                    laterality = state["t_result"].get("laterality")
+                if state.t_result:
+                    laterality = state.t_result.get("laterality")
                     if laterality:
                         context["tumor_laterality"] = laterality
                 
-                n_result = self.n_agent.analyze(state["report_text"], context=context)
-                state["n_result"] = n_result
+                n_result = await self.n_agent.analyze_async(state.report_text, context=context)
+                state.n_result = n_result
                 return state
             except Exception as e:
                 if attempt < max_retries - 1:
                     logger.warning(f"Workflow: N-Agent attempt {attempt + 1} failed, retrying... Error: {str(e)[:200]}")
-                    time.sleep(retry_delay * (2 ** attempt))  # Exponential backoff
+                    await asyncio.sleep(random.uniform(0, retry_delay * (2 ** attempt)))  # Exponential backoff, full jitter
                 else:
                     logger.error(f"Workflow: N-Agent failed after {max_retries} attempts: {e}")
-                    state["error"] = f"N-Agent error: {str(e)}"
+                    state.error = f"N-Agent error: {str(e)}"
                     return state
     
-    def _m_agent_node(self, state: TNMWorkflowState) -> TNMWorkflowState:
+    async def _m_agent_node(self, state: TNMWorkflowState) -> TNMWorkflowState:
         """Execute M-Agent analysis with retry logic."""
-        import time
-        
         max_retries = 3
         retry_delay = 1.0
         
         for attempt in range(max_retries):
             try:
                 logger.info(f"Workflow: Executing M-Agent (attempt {attempt + 1}/{max_retries})")
-                m_result = self.m_agent.analyze(state["report_text"])
-                state["m_result"] = m_result
+                m_result = await self.m_agent.analyze_async(state.report_text)
+                state.m_result = m_result
                 return state
             except Exception as e:
                 if attempt < max_retries - 1:
                     logger.warning(f"Workflow: M-Agent attempt {attempt + 1} failed, retrying... Error: {str(e)[:200]}")
-                    time.sleep(retry_delay * (2 ** attempt))  # Exponential backoff
+                    await asyncio.sleep(random.uniform(0, retry_delay * (2 ** attempt)))  # Exponential backoff, full jitter
                 else:
                     logger.error(f"Workflow: M-Agent failed after {max_retries} attempts: {e}")
-                    state["error"] = f"M-Agent error: {str(e)}"
+                    state.error = f"M-Agent error: {str(e)}"
                     return state
     
-    def _compiler_node(self, state: TNMWorkflowState) -> TNMWorkflowState:
+    async def _staging_agents_node(self, state: TNMWorkflowState) -> TNMWorkflowState:
+        """Execute T/N/M agents concurrently.
+        
+        N-Agent needs tumor laterality from T-Agent, so it is chained after
+        T-Agent while M-Agent runs alongside both. When the combined agent is
+        enabled, a single LLM call is tried first.
+        """
+        if self.combined_agent is not None:
+            try:
+                logger.info("Workflow: Executing Combined-Agent")
+                for key, result in (await self.combined_agent.analyze_async(state.report_text)).items():
+                    setattr(state, key, result)
+                return state
+            except Exception as e:
+                logger.warning(f"Workflow: Combined-Agent failed, running agents separately. Error: {str(e)[:200]}")
+        
+        async def t_then_n() -> None:
+            await self._t_agent_node(state)
+            await self._n_agent_node(state)
+        
+        await asyncio.gather(t_then_n(), self._m_agent_node(state))
+        return state
+    
+    async def _compiler_node(self, state: TNMWorkflowState) -> TNMWorkflowState:
         """Execute Staging Compiler to combine results."""
         try:
             logger.info("Workflow: Executing Staging Compiler")
             
-            if not all([state.get("t_result"), state.get("n_result"), state.get("m_result")]):
+            if not (state.t_result and state.n_result and state.m_result):
                 raise ValueError("Missing one or more staging components (T/N/M)")
             
             context = {
-                "t_result": state["t_result"],
-                "n_result": state["n_result"],
-                "m_result": state["m_result"]
+                "t_result": state.t_result,
+                "n_result": state.n_result,
+                "m_result": state.m_result
             }
             
-            final_staging = self.compiler.analyze(report_text="", context=context)
-            state["final_staging"] = final_staging
+            final_staging = await asyncio.to_thread(self.compiler.analyze, "", context)
+            state.final_staging = final_staging
             return state
         except Exception as e:
             logger.error(f"Workflow: Staging Compiler failed: {e}")
-            state["error"] = f"Staging Compiler error: {str(e)}"
+            state.error = f"Staging Compiler error: {str(e)}"
             return state
     
     def _should_continue_after_agents(self, state: TNMWorkflowState) -> str:
         """Determine if workflow should continue to compiler or end due to errors."""
-        if state.get("error"):
-            logger.error(f"Workflow: Stopping due to error: {state['error']}")
+        if state.error:
+            logger.error(f"Workflow: Stopping due to error: {state.error}")
             return END
         
         # Check if all agents completed
-        if all([state.get("t_result"), state.get("n_result"), state.get("m_result")]):
+        if state.t_result and state.n_result and state.m_result:
             return "compiler"
         else:
             logger.error("Workflow: One or more agents failed to produce results")
-            state["error"] = "Incomplete staging results"
+            state.error = "Incomplete staging results"
             return END
     
-    def _build_graph(self) -> StateGraph:
-        """Build the LangGraph workflow."""
-        workflow = StateGraph(TNMWorkflowState)
-        
-        # Add nodes
-        workflow.add_node("t_agent", self._t_agent_node)
-        workflow.add_node("n_agent", self._n_agent_node)
-        workflow.add_node("m_agent", self._m_agent_node)
-        workflow.add_node("compiler", self._compiler_node)
-        
-        # Define edges - Sequential execution to avoid state conflicts
-        # T-Agent first (provides laterality for N-Agent)
-        workflow.set_entry_point("t_agent")
-        
-        # Then N-Agent (uses laterality from T-Agent)
-        workflow.add_edge("t_agent", "n_agent")
-        
-        # Then M-Agent
-        workflow.add_edge("n_agent", "m_agent")
-        
-        # Finally check if we should continue to compiler
-        workflow.add_conditional_edges(
-            "m_agent",
-            self._should_continue_after_agents,
-            {
-                "compiler": "compiler",
-                END: END
-            }
-        )
-        
-        # Compiler is the final node
-        workflow.add_edge("compiler", END)
+    def run(
+        self,
+        report_text: str,
+        report_id: Optional[str] = None,
+        patient_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Synchronous wrapper around arun.
         
-        return workflow.compile()
+        Args:
+            report_text: Markdown text from PDF OCR conversion
+            report_id: Optional report identifier
+            patient_id: Optional patient identifier
+            
+        Returns:
+            Dict containing final TNM staging results or error information
+        """
+        return asyncio.run(self._arun_and_close(report_text, report_id, patient_id))
     
-    def run(
+    async def _arun_and_close(
+        self,
+        report_text: str,
+        report_id: Optional[str],
+        patient_id: Optional[str]
+    ) -> Dict[str, Any]:
+        """Run arun, then close the LLM client bound to this short-lived loop."""
+        try:
+            return await self.arun(report_text, report_id, patient_id)
+        finally:
+            await aclose_loop_client()
+    
+    async def arun(
         self,
         report_text: str,
         report_id: Optional[str] = None,
@@ -199,20 +223,15 @@ class TNMWorkflow:
         """
         logger.info("Workflow: Starting TNM staging analysis")
         
-        initial_state: TNMWorkflowState = {
-            "report_text": report_text,
-            "report_id": report_id,
-            "patient_id": patient_id,
-            "t_result": None,
-            "n_result": None,
-            "m_result": None,
-            "final_staging": None,
-            "error": None
-        }
+        initial_state = TNMWorkflowState(
+            report_text=report_text,
+            report_id=report_id,
+            patient_id=patient_id
+        )
         
         try:
             # Execute the workflow
-            final_state = self.graph.invoke(initial_state)
+            final_state = await self.graph.ainvoke(initial_state, config={"configurable": {"workflow": self}})
             
             if final_state.get("error"):
                 logger.error(f"Workflow completed with error: {final_state['error']}")
@@ -242,6 +261,74 @@ class TNMWorkflow:
             }
 
 
+def _bound_workflow(config: RunnableConfig) -> TNMWorkflow:
+    """Get the TNMWorkflow whose agents run this graph invocation."""
+    return config["configurable"]["workflow"]
+
+
+async def _staging_agents_step(state: TNMWorkflowState, config: RunnableConfig) -> TNMWorkflowState:
+    """Graph node delegating to TNMWorkflow._staging_agents_node."""
+    return await _bound_workflow(config)._staging_agents_node(state)
+
+
+async def _compiler_step(state: TNMWorkflowState, config: RunnableConfig) -> TNMWorkflowState:
+    """Graph node delegating to TNMWorkflow._compiler_node."""
+    return await _bound_workflow(config)._compiler_node(state)
+
+
+def _route_after_agents(state: TNMWorkflowState, config: RunnableConfig) -> str:
+    """Graph edge delegating to TNMWorkflow._should_continue_after_agents."""
+    return _bound_workflow(config)._should_continue_after_agents(state)
+
+
+def _build_graph() -> StateGraph:
+    """Build the LangGraph workflow.
+    
+    Nodes are free functions that find their TNMWorkflow in the run config,
+    so the graph is compiled once and shared by every workflow instance.
+    """
+    workflow = StateGraph(TNMWorkflowState)
+    
+    # Add nodes
+    workflow.add_node("staging_agents", _staging_agents_step)
+    workflow.add_node("compiler", _compiler_step)
+    
+    # T/N/M agents run concurrently in a single node (N-Agent still
+    # waits for T-Agent laterality), then check if we should compile
+    workflow.set_entry_point("staging_agents")
+    workflow.add_conditional_edges(
+        "staging_agents",
+        _route_after_agents,
+        {
+            "compiler": "compiler",
+            END: END
+        }
+    )
+    
+    # Compiler is the final node
+    workflow.add_edge("compiler", END)
+    
+    return workflow.compile()
+
+
+_COMPILED_GRAPH = _build_graph()
+
+
+# Agents and the compiled graph hold no per-run state, so one workflow is shared
+_WORKFLOW_SINGLETON: Optional[TNMWorkflow] = None
+_WORKFLOW_LOCK = threading.Lock()
+
+
+def _get_workflow() -> TNMWorkflow:
+    """Get the shared TNMWorkflow, building it on first use."""
+    global _WORKFLOW_SINGLETON
+    if _WORKFLOW_SINGLETON is None:
+        with _WORKFLOW_LOCK:
+            if _WORKFLOW_SINGLETON is None:
+                _WORKFLOW_SINGLETON = TNMWorkflow()
+    return _WORKFLOW_SINGLETON
+
+
 def run_tnm_staging_workflow(
     report_text: str,
     report_id: Optional[str] = None,
@@ -257,5 +344,22 @@ def run_tnm_staging_workflow(
     Returns:
         Dict containing final TNM staging results
     """
-    workflow = TNMWorkflow()
-    return workflow.run(report_text, report_id, patient_id)
+    return _get_workflow().run(report_text, report_id, patient_id)
+
+
+async def run_tnm_staging_workflow_async(
+    report_text: str,
+    report_id: Optional[str] = None,
+    patient_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Async convenience function to run TNM staging workflow.
+    
+    Args:
+        report_text: Markdown text from PDF OCR conversion
+        report_id: Optional report identifier
+        patient_id: Optional patient identifier
+        
+    Returns:
+        Dict containing final TNM staging results
+    """
+    return await _get_workflow().arun(report_text, report_id, patient_id)